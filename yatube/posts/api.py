@@ -0,0 +1,196 @@
+"""JSON API только для чтения: ленты, пост и комментарии.
+
+Списки листаются курсором (?cursor=, ?limit=), набор полей задаётся
+?fields=id,text,... . Каждый ответ несёт ETag и Last-Modified из
+поколений кеша страниц и времени их смены, поэтому повторный запрос
+без изменений получает 304, не выполняя запрос ленты.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Sum
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+
+from . import pagecache
+from .conditional import conditional, lookup, request_etag
+from .models import FeedItem, Group, Post
+from .pagination import CursorPaginator
+
+User = get_user_model()
+
+POST_FIELDS = {
+    "id": lambda post: post.pk,
+    "text": lambda post: post.text,
+    "pub_date": lambda post: post.pub_date,
+    "updated": lambda post: post.updated,
+    "author": lambda post: post.author.username,
+    "group": lambda post: post.group.slug if post.group_id else None,
+    "image": lambda post: post.image.url if post.image else None,
+    "comment_count": lambda post: post.comment_count,
+    "url": lambda post: reverse("post", args=(post.author.username,
+                                              post.pk)),
+}
+COMMENT_FIELDS = {
+    "id": lambda comment: comment.pk,
+    "text": lambda comment: comment.text,
+    "created": lambda comment: comment.created,
+    "author": lambda comment: comment.author.username,
+    "post": lambda comment: comment.post_id,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={"ensure_ascii": False})
+
+
+def api_view(view):
+    """Ошибки API отдаются в JSON, а не HTML-страницами."""
+    @wraps(view)
+    @require_safe
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return _json({"detail": "Не найдено."}, status=404)
+        except ApiError as error:
+            return _json({"detail": error.detail}, status=error.status)
+    return wrapper
+
+
+def _fields(request, available):
+    requested = request.GET.get("fields")
+    if not requested:
+        return list(available)
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}.")
+    return names
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", settings.COUNT_POSTS))
+    except ValueError:
+        raise ApiError("limit должен быть числом.")
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def _serialize(objects, available, names):
+    return [{name: available[name](obj) for name in names}
+            for obj in objects]
+
+
+def _paginated(request, objects, available, **cursor_options):
+    names = _fields(request, available)
+    page = CursorPaginator(objects, _limit(request), **cursor_options
+                           ).get_page(request.GET.get("cursor"))
+    return _json({
+        "results": _serialize(page, available, names),
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+def _scope_validators(request, scope):
+    version, modified = pagecache.state(scope)
+    return request_etag(request, version), modified
+
+
+def _index_validators(request):
+    return _scope_validators(request, ("index", 0))
+
+
+def _group_validators(request, slug):
+    group = lookup(request, Group.objects.all(), slug=slug)
+    return _scope_validators(request, ("group", group.pk))
+
+
+def _profile_validators(request, username):
+    author = lookup(request, User.objects.all(), username=username)
+    return _scope_validators(request, ("profile", author.pk))
+
+
+def _follow_validators(request):
+    if not request.user.is_authenticated:
+        return None, None
+    # Лента не длиннее FEED_LENGTH, агрегат по ней дешёвый и ловит
+    # новые посты, отписки, правки и комментарии. Last-Modified нет:
+    # удаление поста из ленты не сдвинуло бы никакую из этих дат.
+    state = FeedItem.objects.filter(user=request.user).aggregate(
+        latest=Max("pub_date"), total=Count("pk"),
+        updated=Max("post__updated"), comments=Sum("post__comment_count"),
+    )
+    return request_etag(request, request.user.pk, *state.values()), None
+
+
+def _post(request, post_id):
+    """Пост с полями выдачи; валидаторы и представление ищут его один
+    раз на запрос."""
+    return lookup(request, Post.objects.for_feed(), pk=post_id)
+
+
+def _post_validators(request, post_id):
+    _post(request, post_id)
+    return _scope_validators(request, ("post", post_id))
+
+
+@api_view
+@conditional(_index_validators)
+def index(request):
+    return _paginated(request, Post.objects.for_feed(), POST_FIELDS)
+
+
+@api_view
+@conditional(_group_validators)
+def group_posts(request, slug):
+    group = lookup(request, Group.objects.all(), slug=slug)
+    return _paginated(request, group.posts.for_feed(), POST_FIELDS)
+
+
+@api_view
+@conditional(_profile_validators)
+def profile(request, username):
+    author = lookup(request, User.objects.all(), username=username)
+    return _paginated(request, author.posts.for_feed(), POST_FIELDS)
+
+
+@api_view
+@conditional(_follow_validators)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError("Нужно войти.", status=401)
+    posts = Post.objects.filter(
+        feed_items__user=request.user
+    ).order_by("-feed_items__pub_date", "-id").for_feed()
+    return _paginated(request, posts, POST_FIELDS)
+
+
+@api_view
+@conditional(_post_validators)
+def post_detail(request, post_id):
+    names = _fields(request, POST_FIELDS)
+    post = _post(request, post_id)
+    return _json(_serialize([post], POST_FIELDS, names)[0])
+
+
+@api_view
+@conditional(_post_validators)
+def comments(request, post_id):
+    post = _post(request, post_id)
+    return _paginated(
+        request,
+        post.comments.select_related("author").order_by("created", "id"),
+        COMMENT_FIELDS, field="created", descending=False,
+    )
@@ -0,0 +1,401 @@
+"""Замеры лент на больших наборах данных через тестовый клиент Django.
+
+Каждая страница меряется на первой («shallow») и на далёкой («deep»)
+странице, с пустым кешем («cold») и после прогрева («warm»).
+
+Профили настроек (dev, prod) сравниваются по-настоящему: каждый
+поднимает свой сервер в отдельном процессе, а страницы запрашиваются
+по HTTP, так что в замер входят соединения с базой, загрузка шаблонов
+и промежуточные слои профиля.
+
+Отрисовка шаблона меряется отдельно: «cold» - первый запрос воркера,
+когда шаблон и все его include ещё надо разобрать, «warm» - после
+прогрева кеширующего загрузчика.
+
+Потоковая отрисовка и сжатие меряются по времени до первого байта и
+по размеру ответа: обычный ответ, сжатый gzip и потоковый сжатый.
+"""
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Count
+from django.template import Engine, RequestContext, engines
+from django.template.backends.django import DjangoTemplates
+from django.test import Client, override_settings, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .metrics import percentile
+from .models import AuthorStats, Group, Post
+
+
+def targets():
+    """Самые тяжёлые группа, автор, пост и лента набора: (адрес, читатель)."""
+    group = Group.objects.annotate(
+        total=Count("posts")
+    ).order_by("-total").first()
+    author = AuthorStats.objects.select_related("user").order_by(
+        "-posts_count"
+    ).first().user
+    reader = AuthorStats.objects.select_related("user").order_by(
+        "-following_count"
+    ).first().user
+    post = Post.objects.order_by("-comment_count").select_related(
+        "author"
+    ).only("pk", "author__username").first()
+    return {
+        "index": (reverse("index"), None),
+        "group_posts": (reverse("group_posts", args=(group.slug,)), None),
+        "profile": (reverse("profile", args=(author.username,)), None),
+        "post": (reverse("post", args=(post.author.username, post.pk)),
+                 None),
+        "follow_index": (reverse("follow_index"), reader),
+    }
+
+
+def _request(client, url, cold):
+    if cold:
+        cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f"{url}: код ответа {response.status_code}")
+    return elapsed, len(queries), len(response.content)
+
+
+def measure(client, url, repeat, cold):
+    if not cold:
+        _request(client, url, cold=False)
+    samples = [_request(client, url, cold) for _ in range(repeat)]
+    latencies = sorted(sample[0] for sample in samples)
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "max_ms": round(latencies[-1], 2),
+        "queries": max(sample[1] for sample in samples),
+        "bytes": samples[-1][2],
+    }
+
+
+def run(repeat=5, deep_page=1000):
+    """Меряет все страницы, отдаёт список строк результата."""
+    results = []
+    for view, (url, reader) in targets().items():
+        client = Client()
+        if reader is not None:
+            client.force_login(reader)
+        pages = (("shallow", 1),)
+        if view != "post":
+            pages += (("deep", deep_page),)
+        for depth, page in pages:
+            page_url = url if page == 1 else f"{url}?page={page}"
+            for cold in (True, False):
+                results.append({
+                    "view": view, "depth": depth, "page": page,
+                    "cache": "cold" if cold else "warm",
+                    **measure(client, page_url, repeat, cold),
+                })
+    return results
+
+
+@contextmanager
+def database(path):
+    """Отдельные соединения с файлом path вместо default и реплики.
+
+    Настроенные соединения и их settings_dict не меняются: на время
+    замера в этом потоке их подменяют новые, потом возвращаются старые.
+    """
+    names = {"default": path,
+             settings.REPLICA_DATABASE: f"file:{pathname2url(path)}?mode=ro"}
+    saved = {}
+    for alias, name in names.items():
+        if alias not in connections.databases:
+            continue
+        saved[alias] = connections[alias]
+        wrapper = type(saved[alias])(
+            {**saved[alias].settings_dict, "NAME": name}, alias
+        )
+        setattr(connections._connections, alias, wrapper)
+    try:
+        yield
+    finally:
+        for alias, original in saved.items():
+            connections[alias].close()
+            setattr(connections._connections, alias, original)
+
+
+def profile_environ(profile, database):
+    """Окружение процесса сервера с профилем profile и базой database."""
+    environ = {**os.environ, "DJANGO_SETTINGS_MODULE": "yatube.settings",
+               "YATUBE_SETTINGS": profile, "YATUBE_DB_NAME": database}
+    # Профилю prod нужен ключ; для замера подойдёт любой.
+    environ.setdefault("YATUBE_SECRET_KEY", "benchmark")
+    return environ
+
+
+def _wait_for(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f"Сервер завершился с кодом {process.returncode}"
+            )
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Сервер не поднялся на порту {port} за {timeout} с")
+
+
+@contextmanager
+def serve(profile, port, database):
+    """Однопоточный runserver с профилем profile на время замера."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"),
+         "runserver", "--noreload", "--nothreading", f"127.0.0.1:{port}"],
+        env=profile_environ(profile, database),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for(port, process)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _fetch(url):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        body = response.read()
+    return (time.perf_counter() - start) * 1000, len(body)
+
+
+def run_profiles(profiles, database, repeat=50, port=8765):
+    """Задержки гостевых страниц в каждом профиле после прогрева."""
+    urls = {view: url for view, (url, reader) in targets().items()
+            if reader is None}
+    results = []
+    for profile in profiles:
+        with serve(profile, port, database) as server:
+            for view, url in urls.items():
+                _fetch(server + url)
+                samples = [_fetch(server + url) for _ in range(repeat)]
+                latencies = sorted(sample[0] for sample in samples)
+                results.append({
+                    "profile": profile, "view": view,
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p90_ms": round(percentile(latencies, 90), 2),
+                    "max_ms": round(latencies[-1], 2),
+                    "bytes": samples[-1][1],
+                })
+    return results
+
+
+def compare_profiles(results):
+    """p50 каждого профиля относительно первого, в процентах."""
+    baseline = {}
+    changes = []
+    for row in results:
+        before = baseline.setdefault(row["view"], row)
+        changes.append({
+            "profile": row["profile"], "view": row["view"],
+            "p50_ms": row["p50_ms"],
+            "p50_change": (
+                round((row["p50_ms"] / before["p50_ms"] - 1) * 100, 1)
+                if before["p50_ms"] else None
+            ),
+        })
+    return changes
+
+
+def _cached_engine():
+    """Копия настроенного шаблонизатора с кеширующим загрузчиком."""
+    configured = next(engine.engine for engine in engines.all()
+                      if isinstance(engine, DjangoTemplates))
+    return Engine(
+        dirs=configured.dirs,
+        context_processors=configured.context_processors,
+        libraries=configured.libraries,
+        loaders=[("django.template.loaders.cached.Loader", [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ])],
+    )
+
+
+def _render_ms(engine, name, request, context, cold):
+    if cold:
+        engine.template_loaders[0].reset()
+    # Фрагменты из кеша спрятали бы стоимость отрисовки.
+    cache.clear()
+    start = time.perf_counter()
+    engine.get_template(name).render(RequestContext(request, context))
+    return (time.perf_counter() - start) * 1000
+
+
+def template_render(name="posts/index.html", repeat=20):
+    """Отрисовка главной до и после прогрева кеширующего загрузчика."""
+    from .views import get_paginator_page
+
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    page = get_paginator_page(request, Post.objects.all())
+    # Запрос ленты выполняется один раз: меряется только шаблон.
+    page.object_list = list(page.object_list)
+    context = {"page": page}
+    engine = _cached_engine()
+    results = {"template": name}
+    for state in ("cold", "warm"):
+        cold = state == "cold"
+        if not cold:
+            _render_ms(engine, name, request, context, cold=False)
+        latencies = sorted(_render_ms(engine, name, request, context, cold)
+                           for _ in range(repeat))
+        results[state] = {
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p90_ms": round(percentile(latencies, 90), 2),
+        }
+    return results
+
+
+STREAMING_MODES = (
+    # (режим, STREAMING_PAGES, Accept-Encoding)
+    ("render", False, None),
+    ("gzip", False, "gzip"),
+    ("stream+gzip", True, "gzip"),
+)
+
+
+def _first_byte(client, url, streaming, encoding):
+    """(мс до первого байта, мс до конца, байт в ответе) с пустым кешем.
+
+    Обычный ответ целиком готов к моменту, когда уходит первый байт.
+    """
+    cache.clear()
+    headers = {"HTTP_ACCEPT_ENCODING": encoding} if encoding else {}
+    with override_settings(STREAMING_PAGES=streaming):
+        start = time.perf_counter()
+        response = client.get(url, **headers)
+        if response.streaming:
+            chunks = iter(response.streaming_content)
+            size = len(next(chunks, b""))
+            first = time.perf_counter()
+            size += sum(len(chunk) for chunk in chunks)
+        else:
+            first = time.perf_counter()
+            size = len(response.content)
+        total = time.perf_counter()
+    response.close()
+    if response.status_code != 200:
+        raise RuntimeError(f"{url}: код ответа {response.status_code}")
+    return (first - start) * 1000, (total - start) * 1000, size
+
+
+def streaming_pages(repeat=20):
+    """Время до первого байта, время ответа и байты лент в каждом режиме."""
+    views = ("index", "group_posts", "profile", "follow_index")
+    results = []
+    for view, (url, reader) in targets().items():
+        if view not in views:
+            continue
+        client = Client()
+        if reader is not None:
+            client.force_login(reader)
+        for mode, streaming, encoding in STREAMING_MODES:
+            _first_byte(client, url, streaming, encoding)
+            samples = [_first_byte(client, url, streaming, encoding)
+                       for _ in range(repeat)]
+            results.append({
+                "view": view, "mode": mode,
+                "ttfb_p50_ms": round(percentile(
+                    sorted(sample[0] for sample in samples), 50), 2),
+                "total_p50_ms": round(percentile(
+                    sorted(sample[1] for sample in samples), 50), 2),
+                "bytes": samples[-1][2],
+            })
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(plan, results):
+    return {
+        "commit": _commit(),
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "dataset": plan.describe(),
+        "results": results,
+    }
+
+
+def profiles_report(database, results):
+    return {
+        "commit": _commit(),
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": database,
+        "results": results,
+    }
+
+
+def _key(row):
+    return row["view"], row["depth"], row["cache"]
+
+
+def compare(old, new):
+    """Изменения p50 и числа запросов относительно прошлого отчёта."""
+    previous = {_key(row): row for row in old["results"]}
+    changes = []
+    for row in new["results"]:
+        before = previous.get(_key(row))
+        if before is None:
+            continue
+        changes.append({
+            "view": row["view"], "depth": row["depth"], "cache": row["cache"],
+            "p50_ms": (before["p50_ms"], row["p50_ms"]),
+            "p50_change": (
+                round((row["p50_ms"] / before["p50_ms"] - 1) * 100, 1)
+                if before["p50_ms"] else None
+            ),
+            "queries": (before["queries"], row["queries"]),
+        })
+    return changes
+
+
+def load(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save(path, data):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,108 @@
+"""Сжатие ответов на лету: brotli, если установлен, иначе gzip.
+
+Уровни COMPRESSION_* подобраны под сжатие каждого ответа: максимальные
+уровни почти не уменьшают HTML, а процессора стоят в разы больше.
+Потоковый ответ сжимается по частям, и каждая часть сразу уходит
+клиенту, не дожидаясь конца страницы.
+"""
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from yatube.staticfiles import accepted_encodings  # type: ignore
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(r"^(text/|application/(json|javascript|xml))")
+
+
+class GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL,
+                                            zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        """Сжимает часть и сбрасывает её, чтобы клиент получил её сразу."""
+        return (self._compressor.compress(data)
+                + self._compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def choose_compressor(request):
+    """(кодировка, класс компрессора) по Accept-Encoding или None."""
+    accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if brotli is not None and "br" in accepted:
+        return "br", BrotliCompressor
+    if "gzip" in accepted:
+        return "gzip", GzipCompressor
+    return None
+
+
+def _compress_stream(compressor, chunks):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы, в том числе потоковые."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.has_header("Content-Encoding")
+                or not COMPRESSIBLE_TYPES.match(
+                    response.get("Content-Type", ""))
+                or (not response.streaming and len(response.content)
+                    < settings.COMPRESSION_MIN_SIZE)):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        chosen = choose_compressor(request)
+        if chosen is None:
+            return response
+        coding, compressor_class = chosen
+        compressor = compressor_class()
+
+        if response.streaming:
+            response.streaming_content = _compress_stream(
+                compressor, response.streaming_content
+            )
+            del response["Content-Length"]
+        else:
+            compressed = (compressor.compress(response.content)
+                          + compressor.finish())
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Сжатое тело отличается побайтно, но не по смыслу.
+        if response.has_header("ETag"):
+            response["ETag"] = re.sub(r'^"', 'W/"', response["ETag"])
+        response["Content-Encoding"] = coding
+        return response
@@ -0,0 +1,98 @@
+"""Условные GET: ETag и Last-Modified без выполнения самого представления.
+
+Валидаторы собираются из поколений кеша страниц и времени их смены,
+которые меняются при любой правке, поэтому неизменившийся ответ
+отдаётся как 304 Not Modified, не трогая запрос ленты.
+"""
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        "|".join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def request_etag(request, *parts):
+    """ETag ответа: адрес, параметры запроса и состояние данных."""
+    return make_etag(request.path, sorted(request.GET.lists()), *parts)
+
+
+def viewer(request):
+    """Чей ответ: гостю общий, вошедшему - свой на каждую сессию.
+
+    Сессия и CSRF-токен в формах страницы меняются при входе вместе,
+    поэтому после повторного входа страница со старым токеном не
+    получит 304.
+    """
+    if not request.user.is_authenticated:
+        return None
+    return request.user.pk, request.session.session_key
+
+
+def lookup(request, queryset, **filters):
+    """get_object_or_404, запомненный на запрос: валидаторы и само
+    представление ищут объект один раз."""
+    found = request.__dict__.setdefault("_lookups", {})
+    key = (queryset.model, tuple(sorted(filters.items())))
+    if key not in found:
+        found[key] = get_object_or_404(queryset, **filters)
+    return found[key]
+
+
+def apply_policy(request, response, policy):
+    """Cache-Control по политике из HTML_CACHE_POLICIES.
+
+    Гостю отдаётся публичный ответ, который могут хранить прокси и CDN;
+    вошедшему - личный, который браузер перепроверяет при каждом
+    запросе. Ответ зависит от входа, поэтому всегда Vary: Cookie.
+    """
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        options = settings.HTML_CACHE_POLICIES[policy]
+        patch_cache_control(response, public=True,
+                            max_age=options["max_age"],
+                            s_maxage=options["s_maxage"])
+    patch_vary_headers(response, ("Cookie",))
+
+
+def conditional(validators, policy=None):
+    """Декоратор: validators(request, *args, **kwargs) -> (etag, дата).
+
+    Любое из значений может быть None. Заголовки ставятся только на
+    ответы 200 и 304 на безопасные запросы; policy - ключ
+    HTML_CACHE_POLICIES для Cache-Control.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            etag, last_modified = validators(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+            timestamp = (timegm(last_modified.utctimetuple())
+                         if last_modified else None)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                if etag and not response.has_header("ETag"):
+                    response["ETag"] = etag
+                if timestamp and not response.has_header("Last-Modified"):
+                    response["Last-Modified"] = http_date(timestamp)
+                if policy is not None:
+                    apply_policy(request, response, policy)
+            return response
+        return wrapper
+    return decorator
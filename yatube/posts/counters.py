@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+def _count_of(queryset, field, outer="pk"):
+    """Подзапрос с числом строк queryset, где field ссылается на outer."""
+    counted = (
+        queryset.filter(**{field: OuterRef(outer)})
+        .order_by().values(field)
+        .annotate(total=Count("pk")).values("total")
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _actual_stats(outer="pk"):
+    return {
+        "posts_count": _count_of(Post.objects.all(), "author", outer),
+        "followers_count": _count_of(Follow.objects.all(), "author", outer),
+        "following_count": _count_of(Follow.objects.all(), "user", outer),
+    }
+
+
+def stats_for(user):
+    """Счётчики пользователя; недостающая строка создаётся по факту.
+
+    Два первых чтения могут разминуться: строку, которую успел создать
+    параллельный запрос, get_or_create перечитывает, а не падает.
+    """
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        counts = User.objects.filter(pk=user.pk).annotate(
+            **_actual_stats()
+        ).values(*AuthorStats.COUNTERS).get()
+        stats, _ = AuthorStats.objects.get_or_create(user=user,
+                                                     defaults=counts)
+        return stats
+
+
+def change_stats(user_id, **deltas):
+    """Сдвигает существующие счётчики.
+
+    Недостающую строку не создаёт: её по факту посчитает stats_for при
+    чтении. Иначе при каскадном удалении пользователя строка, уже
+    удалённая каскадом, пересоздавалась бы по оставшимся строкам, и
+    тот же сдвиг применялся бы к ней второй раз.
+    """
+    AuthorStats.objects.filter(user_id=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+
+
+def change_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F("comment_count") + delta
+    )
+
+
+def reconcile(users=None, posts=None):
+    """Пересчитывает счётчики, возвращает число затронутых строк.
+
+    users и posts - querysets, которыми можно ограничить пересчёт;
+    по умолчанию пересчитываются все.
+    """
+    users = User.objects.all() if users is None else users
+    posts = Post.objects.all() if posts is None else posts
+    missing = users.filter(stats__isnull=True).values_list("pk", flat=True)
+    created = len(AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=user_id) for user_id in missing]
+    ))
+
+    fixed = 0
+    stats = AuthorStats.objects.filter(user__in=users.values("pk"))
+    for name, actual in _actual_stats("user_id").items():
+        fixed += stats.exclude(**{name: actual}).update(**{name: actual})
+    actual = _count_of(Comment.objects.all(), "post")
+    fixed += posts.exclude(comment_count=actual).update(
+        comment_count=actual
+    )
+    return created + fixed
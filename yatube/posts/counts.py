@@ -0,0 +1,71 @@
+"""Число постов в лентах для пагинации, в кеше.
+
+Пагинации по номерам нужно только число страниц, поэтому COUNT(*) по
+ленте (все посты, группа, лента подписок) считается один раз и дальше
+поддерживается сигналами: новый пост увеличивает счётчики общей ленты
+и своей группы, удалённый - уменьшает. Ленты подписок меняются пачками
+при раскладке и подписке, их счётчик просто сбрасывается. Число постов
+автора уже хранит AuthorStats.posts_count.
+
+Точно считаются только первые COUNTS_EXACT_LIMIT строк, остаток большой
+ленты оценивается. ApproximatePaginator берёт страницы срезом, так что
+неточное число сдвигает лишь номер последней страницы.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+
+def _key(scope):
+    kind, pk = scope
+    return f"counts:{kind}:{pk}"
+
+
+def bounded_count(queryset, limit):
+    """Число строк queryset: точное до limit, дальше - оценка.
+
+    COUNT(*) читает не больше limit + 1 строк. Если строк больше,
+    остаток оценивается по плотности первичных ключей: первые limit + 1
+    строк от самого большого ключа занимают отрезок [edge, top], и ниже
+    edge строки считаются распределёнными так же.
+    """
+    rows = queryset.order_by()
+    exact = rows.values("pk")[:limit + 1].count()
+    if exact <= limit:
+        return exact
+    edge = rows.order_by("-pk").values_list("pk", flat=True)[limit]
+    bounds = rows.aggregate(top=Max("pk"), bottom=Min("pk"))
+    if bounds["top"] == edge:
+        return exact
+    rest = (edge - bounds["bottom"]) * limit / (bounds["top"] - edge)
+    return exact + round(rest)
+
+
+def get(scope, queryset):
+    """Число строк области; при промахе считает queryset.
+
+    Если другой процесс успел записать число раньше, берётся его число:
+    оно уже учитывает сдвиги после записи. Пост, добавленный между
+    подсчётом и записью в кеш, всё же может не попасть в число, поэтому
+    COUNTS_TIMEOUT короткий.
+    """
+    key = _key(scope)
+    count = cache.get(key)
+    if count is None:
+        count = bounded_count(queryset, settings.COUNTS_EXACT_LIMIT)
+        if not cache.add(key, count, settings.COUNTS_TIMEOUT):
+            count = cache.get(key, count)
+    return max(count, 0)
+
+
+def change(delta, *scopes):
+    """Сдвигает счётчики областей; отсутствующие посчитаются при чтении."""
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope), delta)
+        except ValueError:
+            pass
+
+
+def forget(*scopes):
+    cache.delete_many([_key(scope) for scope in scopes])
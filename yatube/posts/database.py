@@ -0,0 +1,74 @@
+"""Настройка SQLite и чтение страниц через соединение только для чтения.
+
+При каждом новом соединении SQLite включаются WAL и прагмы из
+SQLITE_PRAGMAS: в режиме WAL читатели не ждут писателя, а писатель не
+ждёт читателей. Представления из READ_ONLY_VIEWS читают через алиас
+REPLICA_DATABASE (тот же файл, открытый только для чтения), запись
+всегда идёт в default.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_DATABASE = "default"
+
+_read_only = ContextVar("read_only", default=False)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            # Режим журнала хранится в самом файле, и сменить его может
+            # только соединение с правом записи.
+            if (name == "journal_mode"
+                    and connection.alias == settings.REPLICA_DATABASE):
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def replica_enabled():
+    return (settings.REPLICA_READS
+            and settings.REPLICA_DATABASE in settings.DATABASES)
+
+
+class ReadOnlyViewMiddleware:
+    """Помечает запросы к представлениям из READ_ONLY_VIEWS."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _read_only.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_only.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.url_name in settings.READ_ONLY_VIEWS:
+            _read_only.set(True)
+
+
+class ReadReplicaRouter:
+    """Чтение в помеченных запросах идёт в реплику, запись - в default."""
+
+    def db_for_read(self, model, **hints):
+        if _read_only.get() and replica_enabled():
+            return settings.REPLICA_DATABASE
+        return DEFAULT_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика - тот же файл, объекты из неё связываются свободно.
+        databases = {DEFAULT_DATABASE, settings.REPLICA_DATABASE}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DATABASE
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from .models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам всех подписчиков автора,
+    возвращает их id."""
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list("user_id", flat=True)
+    )
+    FeedItem.objects.bulk_create(
+        [FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in follower_ids],
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(overfull(Follow.objects.filter(author_id=post.author_id)
+                  .values("user_id")))
+    return follower_ids
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты автора."""
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by("-pub_date", "-id")
+        .values_list("id", "pub_date")[:settings.FEED_LENGTH]
+    )
+    FeedItem.objects.bulk_create(
+        [FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts],
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(overfull([user_id]))
+
+
+def remove(user_id, author_id):
+    """Убирает посты автора из ленты бывшего подписчика."""
+    FeedItem.objects.filter(user_id=user_id,
+                            post__author_id=author_id).delete()
+
+
+def overfull(user_ids):
+    """Подписчики из user_ids (список или запрос), чья лента длиннее
+    FEED_LENGTH + FEED_TRIM_SLACK.
+
+    Один запрос: для каждой ленты индекс проверяет, есть ли запись за
+    этой границей, без сортировки и подсчёта всех записей.
+    """
+    limit = settings.FEED_LENGTH + settings.FEED_TRIM_SLACK
+    beyond = (
+        FeedItem.objects.filter(user_id=OuterRef("pk"))
+        .order_by("-pub_date", "-post_id")
+        .values("id")[limit:limit + 1]
+    )
+    return list(
+        User.objects.filter(pk__in=user_ids)
+        .annotate(beyond=Subquery(beyond))
+        .filter(beyond__isnull=False)
+        .values_list("pk", flat=True)
+    )
+
+
+def trim(user_ids):
+    """Оставляет в лентах подписчиков user_ids не больше FEED_LENGTH
+    самых свежих записей, одним DELETE на все ленты сразу."""
+    if not user_ids:
+        return
+    ranked = (
+        FeedItem.objects.filter(user_id__in=user_ids)
+        .annotate(position=Window(
+            RowNumber(), partition_by=[F("user_id")],
+            order_by=[F("pub_date").desc(), F("post_id").desc()],
+        ))
+        .order_by()
+        .values("id", "position")
+    )
+    sql, params = ranked.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FeedItem._meta.db_table} WHERE id IN ("
+            f"SELECT ranked.id FROM ({sql}) ranked "
+            f"WHERE ranked.position > %s)",
+            [*params, settings.FEED_LENGTH],
+        )
+
+
+def _insert_latest(user_id):
+    """Копирует в ленту последние посты подписок одним INSERT ... SELECT,
+    не поднимая строки в Python."""
+    posts = (
+        Post.objects.filter(author__following__user_id=user_id)
+        .order_by("-pub_date", "-id")
+        .values("id", "pub_date")[:settings.FEED_LENGTH]
+    )
+    sql, params = posts.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FeedItem._meta.db_table} "
+            f"(user_id, post_id, pub_date) "
+            f"SELECT %s, latest.id, latest.pub_date FROM ({sql}) latest",
+            [user_id, *params],
+        )
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты с нуля, возвращает число пересобранных лент."""
+    followers = Follow.objects.order_by().values_list("user_id", flat=True)
+    if user_ids is not None:
+        followers = followers.filter(user_id__in=user_ids)
+    rebuilt = 0
+    for user_id in followers.distinct().iterator():
+        with transaction.atomic():
+            FeedItem.objects.filter(user_id=user_id).delete()
+            _insert_latest(user_id)
+        rebuilt += 1
+    stale = FeedItem.objects.exclude(
+        user_id__in=Follow.objects.values("user_id")
+    )
+    if user_ids is not None:
+        stale = stale.filter(user_id__in=user_ids)
+    stale.delete()
+    return rebuilt
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import images
 from .models import Comment, Post
 
 
@@ -13,6 +15,12 @@ class PostForm(forms.ModelForm):
             'image': '* Выберите картинку для добавления к посту'
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        return images.bound_master(image, *images.validate_upload(image))
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,136 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+MIME_TYPES = {"AVIF": "image/avif", "WEBP": "image/webp",
+              "JPEG": "image/jpeg"}
+EXTENSIONS = {"AVIF": "avif", "WEBP": "webp", "JPEG": "jpg"}
+
+
+def validate_upload(upload):
+    """Проверяет загрузку по заголовку, не раскодируя пиксели.
+
+    Возвращает (формат, ширина, высота).
+    """
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            "Файл больше %(limit)s.",
+            code="file_too_large",
+            params={"limit": filesizeformat(
+                settings.POST_IMAGE_MAX_UPLOAD_SIZE
+            )},
+        )
+    upload.seek(0)
+    try:
+        with Image.open(upload) as header:
+            fmt, (width, height) = header.format, header.size
+    except Image.DecompressionBombError:
+        raise ValidationError("Картинка слишком большая.",
+                              code="decompression_bomb")
+    except (OSError, SyntaxError, ValueError):
+        raise ValidationError("Не удалось прочитать картинку.",
+                              code="invalid_image")
+    finally:
+        upload.seek(0)
+
+    if fmt not in settings.POST_IMAGE_FORMATS:
+        raise ValidationError("Формат %(format)s не поддерживается.",
+                              code="invalid_format", params={"format": fmt})
+    limit = (settings.POST_IMAGE_MAX_PIXELS if fmt == "JPEG"
+             else settings.POST_IMAGE_MAX_DECODE_PIXELS)
+    if width * height > limit:
+        raise ValidationError("Картинка слишком большая.",
+                              code="decompression_bomb")
+    return fmt, width, height
+
+
+def bound_master(upload, fmt, width, height):
+    """Уменьшает картинку больше POST_IMAGE_MAX_SIDE и пересохраняет её.
+
+    JPEG раскодируется сразу в уменьшенном масштабе (draft), поэтому
+    даже огромная фотография не разворачивается в памяти целиком.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    if max(width, height) <= max_side:
+        return upload
+    upload.seek(0)
+    with Image.open(upload) as source:
+        source.draft(None, (max_side, max_side))
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = BytesIO()
+        image.save(buffer, fmt, quality=settings.POST_IMAGE_QUALITY)
+    return ContentFile(buffer.getvalue(), name=upload.name)
+
+
+def supported_formats():
+    """Форматы из IMAGE_VARIANT_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [fmt for fmt in settings.IMAGE_VARIANT_FORMATS
+            if fmt in Image.SAVE and fmt in EXTENSIONS]
+
+
+def _prepare(source, fmt):
+    if fmt == "JPEG":
+        return source.convert("RGB")
+    if source.mode not in ("RGB", "RGBA"):
+        return source.convert("RGBA")
+    return source
+
+
+def build_variants(image):
+    """Режет картинку поста на несколько ширин во всех форматах.
+
+    Возвращает метаданные производных: адрес, имя в хранилище, размеры,
+    формат и размер файла в байтах.
+    """
+    with image.open("rb"):
+        source = ImageOps.exif_transpose(Image.open(image))
+        source.load()
+
+    stem = os.path.splitext(os.path.basename(image.name))[0]
+    variants = []
+    for fmt in supported_formats():
+        prepared = _prepare(source, fmt)
+        for width in settings.IMAGE_VARIANT_WIDTHS:
+            height = round(width / settings.IMAGE_VARIANT_RATIO)
+            resized = ImageOps.fit(prepared, (width, height), Image.LANCZOS)
+            buffer = BytesIO()
+            resized.save(buffer, fmt, quality=settings.IMAGE_VARIANT_QUALITY)
+            name = default_storage.save(
+                f"posts/variants/{stem}-{width}.{EXTENSIONS[fmt]}",
+                ContentFile(buffer.getvalue()),
+            )
+            variants.append({
+                "url": default_storage.url(name),
+                "name": name,
+                "width": width,
+                "height": height,
+                "format": fmt,
+                "size": buffer.tell(),
+            })
+    return variants
+
+
+def delete_variants(variants):
+    for variant in variants:
+        default_storage.delete(variant["name"])
+
+
+def sources(variants):
+    """Группирует производные по формату для тегов <source> с srcset."""
+    grouped = {}
+    for variant in variants:
+        grouped.setdefault(variant["format"], []).append(
+            f"{variant['url']} {variant['width']}w"
+        )
+    return [{"type": MIME_TYPES[fmt], "srcset": ", ".join(srcset)}
+            for fmt, srcset in grouped.items()]
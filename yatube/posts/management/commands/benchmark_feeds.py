@@ -0,0 +1,96 @@
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from posts import benchmark, synthetic  # type: ignore
+from posts.models import Post  # type: ignore
+
+
+class Command(BaseCommand):
+    help = ("Меряет время и число запросов лент на синтетическом наборе "
+            "данных в отдельной базе SQLite")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=synthetic.SCALES,
+                            default="small", help="размер набора")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--database",
+            help="файл базы; по умолчанию benchmarks/<scale>-<seed>.sqlite3",
+        )
+        parser.add_argument("--regenerate", action="store_true",
+                            help="удалить базу и сгенерировать набор заново")
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                            help="число процессов генерации")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="замеров на каждую страницу")
+        parser.add_argument("--deep-page", type=int, default=1000,
+                            help="номер далёкой страницы")
+        parser.add_argument("--output", help="куда записать JSON-отчёт")
+        parser.add_argument("--compare",
+                            help="прошлый JSON-отчёт для сравнения")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Бенчмарк поднимает отдельную базу SQLite, "
+                               "а настроена другая СУБД")
+        path = options["database"] or os.path.join(
+            settings.BASE_DIR, "benchmarks",
+            f"{options['scale']}-{options['seed']}.sqlite3",
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if options["regenerate"] and os.path.exists(path):
+            os.remove(path)
+        # Панель отладки и запись SQL в DEBUG искажают замеры.
+        with override_settings(DEBUG=False), benchmark.database(path):
+            self.measure(path, options)
+
+    def measure(self, path, options):
+        call_command("migrate", verbosity=0)
+
+        plan = synthetic.Plan.for_scale(options["scale"],
+                                        seed=options["seed"])
+        if Post.objects.exists():
+            self.stdout.write(f"Набор уже загружен в {path}")
+        else:
+            self.stdout.write(f"Генерация набора в {path}")
+            synthetic.generate(plan, options["batch_size"],
+                               max(options["workers"], 1), self.progress)
+
+        data = benchmark.report(plan, benchmark.run(options["repeat"],
+                                                    options["deep_page"]))
+        for row in data["results"]:
+            self.stdout.write(
+                "{view:<14}{depth:<9}{cache:<6}{p50_ms:>10} мс"
+                "{p90_ms:>10} мс{queries:>5} запр.".format(**row)
+            )
+        if options["output"]:
+            benchmark.save(options["output"], data)
+            self.stdout.write(self.style.SUCCESS(
+                f"Отчёт записан в {options['output']}"
+            ))
+        if options["compare"]:
+            self.show_changes(benchmark.compare(
+                benchmark.load(options["compare"]), data
+            ))
+
+    def progress(self, table, done, total):
+        self.stdout.write(f"  {table}: {done}/{total}")
+
+    def show_changes(self, changes):
+        self.stdout.write("Сравнение с прошлым отчётом (p50, запросы):")
+        for row in changes:
+            (old_ms, new_ms), (old_q, new_q) = row["p50_ms"], row["queries"]
+            change = ("" if row["p50_change"] is None
+                      else f"{row['p50_change']:+}%")
+            line = (f"{row['view']:<14}{row['depth']:<9}{row['cache']:<6}"
+                    f"{old_ms:>10} → {new_ms:<10}{change:>8}"
+                    f"{old_q:>5} → {new_q}")
+            if old_q < new_q:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
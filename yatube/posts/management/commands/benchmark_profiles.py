@@ -0,0 +1,59 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import benchmark  # type: ignore
+from posts.models import Post  # type: ignore
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает задержки страниц в профилях настроек: каждый "
+            "профиль поднимает свой сервер и опрашивается по HTTP")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", nargs="+", default=["dev", "prod"],
+                            help="профили; первый служит базой сравнения")
+        parser.add_argument(
+            "--database",
+            help="файл базы SQLite, например набор из benchmark_feeds; "
+                 "по умолчанию база из настроек",
+        )
+        parser.add_argument("--repeat", type=int, default=50,
+                            help="запросов на каждую страницу")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--output", help="куда записать JSON-отчёт")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Профили сравниваются на базе SQLite, "
+                               "а настроена другая СУБД")
+        database = os.path.abspath(
+            options["database"] or settings.DATABASES["default"]["NAME"]
+        )
+        if not os.path.exists(database):
+            raise CommandError(f"Нет базы {database}")
+        connection.close()
+        connection.settings_dict["NAME"] = database
+        if not Post.objects.exists():
+            raise CommandError("База пуста: наполните её командой seed")
+
+        try:
+            results = benchmark.run_profiles(
+                options["profiles"], database, options["repeat"],
+                options["port"],
+            )
+        except RuntimeError as error:
+            raise CommandError(error)
+        for row in benchmark.compare_profiles(results):
+            change = ("" if row["p50_change"] is None
+                      else f"{row['p50_change']:+}%")
+            self.stdout.write(f"{row['profile']:<8}{row['view']:<14}"
+                              f"{row['p50_ms']:>10} мс{change:>10}")
+        if options["output"]:
+            benchmark.save(options["output"],
+                           benchmark.profiles_report(database, results))
+            self.stdout.write(self.style.SUCCESS(
+                f"Отчёт записан в {options['output']}"
+            ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from posts import benchmark  # type: ignore
+from posts.models import Post  # type: ignore
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает ленты с обычной отрисовкой, со сжатием и с "
+            "потоковой отрисовкой: время до первого байта и размер ответа")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20,
+                            help="запросов на каждую страницу и режим")
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError("База пуста: наполните её командой seed")
+        # Панель отладки и запись SQL в DEBUG искажают замеры.
+        with override_settings(DEBUG=False):
+            rows = benchmark.streaming_pages(options["repeat"])
+        for row in rows:
+            self.stdout.write(
+                "{view:<14}{mode:<13}{ttfb_p50_ms:>10} мс"
+                "{total_p50_ms:>10} мс{bytes:>10} Б".format(**row)
+            )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import benchmark  # type: ignore
+
+
+class Command(BaseCommand):
+    help = ("Меряет отрисовку шаблона на текущей базе: с разбором шаблона "
+            "(первый запрос воркера) и после прогрева")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--template", default="posts/index.html")
+        parser.add_argument("--repeat", type=int, default=20,
+                            help="отрисовок в каждом состоянии")
+
+    def handle(self, *args, **options):
+        result = benchmark.template_render(options["template"],
+                                           options["repeat"])
+        for state in ("cold", "warm"):
+            self.stdout.write("{state:<6}{p50_ms:>10} мс{p90_ms:>10} мс"
+                              .format(state=state, **result[state]))
+        cold, warm = result["cold"]["p50_ms"], result["warm"]["p50_ms"]
+        if warm:
+            self.stdout.write(f"Прогрев ускоряет отрисовку в "
+                              f"{cold / warm:.1f} раза")
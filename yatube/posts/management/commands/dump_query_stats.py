@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import metrics  # type: ignore
+
+
+class Command(BaseCommand):
+    help = "Выводит процентили запросов и времени по представлениям"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true",
+                            help="Вывести отчёт в JSON")
+
+    def handle(self, *args, **options):
+        report = metrics.summarize(metrics.collect())
+        if options["json"]:
+            self.stdout.write(json.dumps(report, ensure_ascii=False,
+                                         indent=2))
+            return
+        if not report:
+            self.stdout.write("Замеров пока нет")
+            return
+        header = f"{'view':<24}{'n':>7}" + "".join(
+            f"{field:>24}" for field in metrics.FIELDS
+        )
+        self.stdout.write(header)
+        for view_name, row in report.items():
+            cells = "".join(
+                "{p50:g}/{p90:g}/{p99:g}".format(**row[field]).rjust(24)
+                for field in metrics.FIELDS
+            )
+            self.stdout.write(f"{view_name:<24}{row['count']:>7}{cells}")
+        self.stdout.write("Столбцы: p50/p90/p99")
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails  # type: ignore
+from posts.models import Post  # type: ignore
+
+
+class Command(BaseCommand):
+    help = "Строит миниатюры для картинок уже опубликованных постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=settings.THUMBNAIL_WORKERS,
+            help="число параллельных потоков",
+        )
+        parser.add_argument(
+            "--all", action="store_true", dest="rebuild",
+            help="перестроить миниатюры и там, где они уже есть",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="").exclude(image__isnull=True)
+        if not options["rebuild"]:
+            posts = posts.filter(thumbnails="{}")
+        post_ids = posts.values_list("pk", flat=True).iterator()
+
+        done = failed = 0
+        for post_id, error in thumbnails.backfill(post_ids,
+                                                  options["workers"]):
+            if error is None:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f"Пост {post_id}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Построено: {done}, с ошибками: {failed}"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed  # type: ignore
+
+
+class Command(BaseCommand):
+    help = "Пересобирает ленты подписок с нуля"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids",
+            help="id подписчика, чью ленту нужно пересобрать "
+                 "(можно указать несколько раз)",
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = feed.rebuild(options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Пересобрано лент: {rebuilt}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters  # type: ignore
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики постов, комментариев и подписок"
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Исправлено строк: {fixed}"))
@@ -0,0 +1,82 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import synthetic  # type: ignore
+
+COUNTS = ("users", "groups", "posts", "comments", "follows")
+
+
+def exponent(value):
+    relation, _, power = value.partition("=")
+    if relation not in synthetic.EXPONENTS or not power:
+        raise ValueError(value)
+    return relation, float(power)
+
+
+class Command(BaseCommand):
+    help = ("Быстро заполняет базу синтетическими пользователями, группами, "
+            "постами, комментариями и подписками")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=synthetic.SCALES,
+                            default="small",
+                            help="готовый набор размеров таблиц")
+        for table in COUNTS:
+            parser.add_argument(f"--{table}", type=int,
+                                help=f"сколько строк {table} создать")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--days", type=int, default=365,
+                            help="за сколько дней распределить посты")
+        parser.add_argument(
+            "--exponent", type=exponent, action="append", default=[],
+            metavar="СВЯЗЬ=ПОКАЗАТЕЛЬ",
+            help="показатель Ципфа для связи: "
+                 + ", ".join(synthetic.EXPONENTS) + "; 0 — равномерно",
+        )
+        parser.add_argument("--group-share", type=float, default=0.7,
+                            help="доля постов в группах")
+        parser.add_argument("--image-share", type=float, default=0.0,
+                            help="доля постов с картинкой-заглушкой")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                            help="число процессов загрузки")
+        parser.add_argument("--batch-size", type=int, default=5_000,
+                            help="строк в одной транзакции")
+
+    def handle(self, *args, **options):
+        sizes = {table: options[table] for table in COUNTS
+                 if options[table] is not None}
+        if any(size < 0 for size in sizes.values()):
+            raise CommandError("Размеры таблиц не могут быть меньше нуля")
+        plan = synthetic.Plan.for_scale(
+            options["scale"], **sizes, seed=options["seed"],
+            days=options["days"], exponents=dict(options["exponent"]),
+            group_share=options["group_share"],
+            image_share=options["image_share"],
+            offsets=synthetic.current_offsets(),
+        )
+        counts = plan.counts
+        if not counts["users"] and (counts["posts"] or counts["comments"]
+                                    or counts["follows"]):
+            raise CommandError("Постам, комментариям и подпискам нужны "
+                               "пользователи")
+        if not counts["posts"] and counts["comments"]:
+            raise CommandError("Комментариям нужны посты")
+
+        self.started = time.monotonic()
+        try:
+            synthetic.generate(plan, options["batch_size"],
+                               max(options["workers"], 1), self.progress)
+        except ValueError as error:
+            raise CommandError(error)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            "Создано: " + ", ".join(
+                f"{table} {count}" for table, count in plan.counts.items()
+            ) + f" за {elapsed:.0f} с"
+        ))
+
+    def progress(self, table, done, total):
+        rate = done / max(time.monotonic() - self.started, 1e-3)
+        self.stdout.write(f"  {table}: {done}/{total} ({rate:.0f} строк/с)")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import warmup  # type: ignore
+
+
+class Command(BaseCommand):
+    help = ("Компилирует все шаблоны проекта: проверяет, что они "
+            "собираются, и показывает, сколько стоит их первый разбор")
+
+    def handle(self, *args, **options):
+        timings = warmup.warmup()
+        total = sum(ms for _, ms in timings)
+        if options["verbosity"] > 1:
+            for name, ms in sorted(timings, key=lambda item: -item[1]):
+                self.stdout.write(f"{ms:>8.2f} мс  {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Скомпилировано шаблонов: {len(timings)} за {total:.1f} мс"
+        ))
@@ -0,0 +1,252 @@
+"""Бюджет запросов: замеры страниц по именам URL.
+
+Middleware считает для каждого запроса число SQL-запросов, время SQL,
+время отрисовки шаблона и размер ответа. Потоковый ответ меряется до
+конца итерации: запросы, выполненные при отрисовке частей, входят в
+замер, а временем отрисовки считается время итерации за вычетом SQL.
+Последние METRICS_WINDOW замеров каждого представления хранятся в
+памяти процесса; раз в METRICS_PUBLISH_INTERVAL секунд процесс
+выкладывает их в кеш, откуда их собирают страница статистики и
+команда dump_query_stats.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("queries", "sql_ms", "template_ms", "total_ms", "bytes")
+PERCENTILES = (50, 90, 99)
+# Счётчик выданных процессам слотов; замеры процесса лежат под ключом
+# его слота.
+PROCESSES_KEY = "metrics:processes"
+
+_local = threading.local()
+_lock = threading.Lock()
+_samples = {}
+_published = 0.0
+# (pid, номер слота): после fork дочерний процесс берёт себе новый слот.
+_slot = None
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class Measurement:
+    """Замер одного запроса; заодно обёртка для execute_wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql += time.perf_counter() - start
+
+
+class TimedTemplate:
+    """Шаблон, который добавляет время отрисовки к текущему замеру."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        measurement = getattr(_local, "measurement", None)
+        if measurement is None or measurement.rendering:
+            return self.template.render(context, request)
+        measurement.rendering = True
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            measurement.rendering = False
+            measurement.template += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django с замером времени отрисовки."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+@contextmanager
+def _measuring(measurement):
+    """Считает запросы всех соединений в measurement."""
+    _local.measurement = measurement
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(measurement))
+            yield
+    finally:
+        _local.measurement = None
+
+
+def _finish(view_name, measurement, start, size):
+    record(view_name, {
+        "queries": measurement.queries,
+        "sql_ms": measurement.sql * 1000,
+        "template_ms": measurement.template * 1000,
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "bytes": size,
+    })
+    check_budget(view_name, measurement.queries)
+
+
+def _measured_stream(view_name, measurement, start, chunks):
+    size = 0
+    chunks = iter(chunks)
+    while True:
+        began, sql = time.perf_counter(), measurement.sql
+        with _measuring(measurement):
+            chunk = next(chunks, None)
+        measurement.template += (time.perf_counter() - began
+                                 - (measurement.sql - sql))
+        if chunk is None:
+            break
+        size += len(chunk)
+        yield chunk
+    _finish(view_name, measurement, start, size)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        measurement = Measurement()
+        start = time.perf_counter()
+        with _measuring(measurement):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is None or not match.url_name:
+            return response
+        if response.streaming:
+            response.streaming_content = _measured_stream(
+                match.view_name, measurement, start,
+                response.streaming_content,
+            )
+        else:
+            _finish(match.view_name, measurement, start,
+                    len(response.content))
+        return response
+
+
+def check_budget(view_name, queries):
+    budget = settings.QUERY_BUDGETS.get(view_name)
+    if budget is None or queries <= budget:
+        return
+    message = (f"{view_name}: {queries} запросов при бюджете {budget}")
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def record(view_name, sample):
+    with _lock:
+        if view_name not in _samples:
+            _samples[view_name] = deque(maxlen=settings.METRICS_WINDOW)
+        _samples[view_name].append(tuple(sample[field] for field in FIELDS))
+    if time.monotonic() - _published >= settings.METRICS_PUBLISH_INTERVAL:
+        publish()
+
+
+def _samples_key(slot):
+    return f"metrics:samples:{slot}"
+
+
+def _claim_slot():
+    """Номер слота от атомарного incr: два процесса не получат один
+    номер и не затрут записи друг друга."""
+    cache.add(PROCESSES_KEY, 0, None)
+    return cache.incr(PROCESSES_KEY)
+
+
+def publish():
+    """Выкладывает замеры процесса в кеш для сборки по всем процессам."""
+    global _published, _slot
+    _published = time.monotonic()
+    with _lock:
+        samples = {name: list(rows) for name, rows in _samples.items()}
+    pid = os.getpid()
+    # Счётчик меньше номера слота - кеш очистили, и номер могли выдать
+    # заново.
+    if (_slot is None or _slot[0] != pid
+            or cache.get(PROCESSES_KEY, 0) < _slot[1]):
+        _slot = (pid, _claim_slot())
+    cache.set(_samples_key(_slot[1]), samples,
+              settings.METRICS_PUBLISH_INTERVAL * 10)
+
+
+def _published_keys():
+    return [_samples_key(slot)
+            for slot in range(1, cache.get(PROCESSES_KEY, 0) + 1)]
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+    cache.delete_many(_published_keys())
+    cache.delete(PROCESSES_KEY)
+
+
+def collect():
+    """Замеры всех процессов, выложенные в кеш."""
+    published = cache.get_many(_published_keys())
+    merged = defaultdict(list)
+    for samples in published.values():
+        for view_name, rows in samples.items():
+            merged[view_name].extend(rows)
+    return merged
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[rank - 1]
+
+
+def summarize(samples):
+    report = {}
+    for view_name, rows in sorted(samples.items()):
+        columns = dict(zip(FIELDS, (sorted(column) for column in zip(*rows))))
+        report[view_name] = {"count": len(rows)}
+        for field, values in columns.items():
+            report[view_name][field] = {
+                **{f"p{percent}": round(percentile(values, percent), 2)
+                   for percent in PERCENTILES},
+                "max": round(values[-1], 2),
+            }
+    return report
+
+
+def report():
+    """Процентили по всем процессам, включая свежие замеры текущего."""
+    publish()
+    return summarize(collect())
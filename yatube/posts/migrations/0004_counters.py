@@ -0,0 +1,68 @@
+# Generated by Django 2.2.6 on 2026-10-18 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_of(model, field):
+    counted = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field)
+        .annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    Post.objects.update(comment_count=count_of(Comment, 'post'))
+    users = User.objects.annotate(
+        posts_count=count_of(Post, 'author'),
+        followers_count=count_of(Follow, 'author'),
+        following_count=count_of(Follow, 'user'),
+    ).values_list('pk', 'posts_count', 'followers_count', 'following_count')
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=pk, posts_count=posts, followers_count=followers,
+                     following_count=following)
+         for pk, posts, followers, following in users.iterator()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0003_post_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Число подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Число подписок')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Счётчики автора',
+                'verbose_name_plural': 'Счётчики авторов',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
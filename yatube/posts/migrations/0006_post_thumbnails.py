@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(default='{}', editable=False, verbose_name='Миниатюры'),
+        ),
+    ]
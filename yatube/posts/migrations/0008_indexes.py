@@ -0,0 +1,62 @@
+# Generated by Django 2.2.6 on 2026-10-18 12:10
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    counted = (
+        model.objects.filter(**{field: OuterRef('user')})
+        .order_by().values(field)
+        .annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+
+    keep = (
+        Follow.objects.order_by().values('user', 'author')
+        .annotate(first=Min('pk')).values('first')
+    )
+    deleted, _ = Follow.objects.exclude(pk__in=keep).delete()
+    if deleted:
+        AuthorStats.objects.update(
+            followers_count=count_of(Follow, 'author'),
+            following_count=count_of(Follow, 'user'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -1,5 +1,9 @@
+import json
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, router, transaction
+
+from . import images
 
 User = get_user_model()
 
@@ -20,10 +24,37 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для карточек ленты: только то, что выводит post_item."""
+        return self.select_related("author", "group").only(
+            "text", "pub_date", "updated", "image", "thumbnails",
+            "comment_count", "author", "group",
+            "author__username", "group__slug", "group__title",
+        )
+
+
+class CountedModel(models.Model):
+    """Модель, от которой сигналы обновляют счётчики: строка и счётчики
+    сохраняются в одной транзакции. Удаление Django и так выполняет
+    вместе с сигналами в транзакции."""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self),
+                                                           instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class Post(CountedModel):
     text = models.TextField(verbose_name="Текст поста")
     pub_date = models.DateTimeField(verbose_name="Дата публикации",
                                     auto_now_add=True)
+    updated = models.DateTimeField(verbose_name="Дата изменения",
+                                   auto_now=True)
     author = models.ForeignKey(User, verbose_name="Автор поста",
                                on_delete=models.CASCADE,
                                related_name="posts")
@@ -32,17 +63,45 @@ class Post(models.Model):
                               verbose_name="Группа")
     image = models.ImageField(upload_to='posts/', blank=True, null=True,
                               verbose_name="Картинка")
+    comment_count = models.PositiveIntegerField(
+        verbose_name="Число комментариев", default=0, editable=False
+    )
+    thumbnails = models.TextField(verbose_name="Миниатюры", default="{}",
+                                  editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
+        indexes = [
+            models.Index(fields=("-pub_date", "-id"),
+                         name="post_pub_date_idx"),
+            models.Index(fields=("author", "-pub_date", "-id"),
+                         name="post_author_pub_date_idx"),
+            models.Index(fields=("group", "-pub_date", "-id"),
+                         name="post_group_pub_date_idx"),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def thumbnail_urls(self):
+        """Адреса готовых миниатюр, если они построены для текущей картинки."""
+        thumbnails = json.loads(self.thumbnails or "{}")
+        if not self.image or thumbnails.get("image") != self.image.name:
+            return {}
+        return thumbnails
+
+    @property
+    def image_sources(self):
+        """Источники <picture>: производные картинки по форматам."""
+        return images.sources(self.thumbnail_urls.get("variants", []))
 
-class Comment(models.Model):
+
+class Comment(CountedModel):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
                              related_name="comments", verbose_name="Пост")
     text = models.TextField(verbose_name="Текст комментария")
@@ -56,12 +115,16 @@ class Comment(models.Model):
         ordering = ("created",)
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(fields=("post", "created"),
+                         name="comment_post_created_idx"),
+        ]
 
     def __str__(self):
         return f"Комментарий от {self.author}: {self.text[:30]}"
 
 
-class Follow(models.Model):
+class Follow(CountedModel):
     user = models.ForeignKey(User, verbose_name="Подписчик",
                              on_delete=models.CASCADE,
                              related_name="follower")
@@ -72,6 +135,60 @@ class Follow(models.Model):
     class Meta:
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
+        constraints = [
+            models.UniqueConstraint(fields=("user", "author"),
+                                    name="unique_follow"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} подписан на {self.author.username}"
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(User, verbose_name="Подписчик",
+                             on_delete=models.CASCADE,
+                             related_name="feed")
+    post = models.ForeignKey(Post, verbose_name="Пост",
+                             on_delete=models.CASCADE,
+                             related_name="feed_items")
+    pub_date = models.DateTimeField(verbose_name="Дата публикации")
+
+    class Meta:
+        ordering = ("-pub_date",)
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        indexes = [
+            models.Index(fields=("user", "-pub_date", "-post"),
+                         name="feed_user_pub_date_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=("user", "post"),
+                                    name="unique_feed_item"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} в ленте {self.user_id}"
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(User, verbose_name="Пользователь",
+                                on_delete=models.CASCADE,
+                                related_name="stats")
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Число постов", default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name="Число подписчиков", default=0
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name="Число подписок", default=0
+    )
+
+    COUNTERS = ("posts_count", "followers_count", "following_count")
+
+    class Meta:
+        verbose_name = "Счётчики автора"
+        verbose_name_plural = "Счётчики авторов"
+
+    def __str__(self):
+        return f"Счётчики {self.user_id}"
@@ -0,0 +1,150 @@
+"""Кеш страниц на поколениях.
+
+Каждая запись хранит вместе с HTML номера поколений своих областей
+(весь сайт + лента, группа, профиль или пост). Сигналы увеличивают
+поколение области, и запись сразу становится устаревшей, поэтому
+хранить её можно часами. Пересчёт устаревшей записи выполняет один
+процесс под блокировкой, остальные пока отдают старую версию.
+
+Рядом с поколением хранится время его смены: из него условные запросы
+берут Last-Modified, который меняется вместе с ETag при любой правке.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+SITE = ("site", 0)
+STATS = ("hit", "miss", "stale")
+
+
+def _generation_key(scope):
+    kind, pk = scope
+    return f"pagecache:gen:{kind}:{pk}"
+
+
+def _modified_key(scope):
+    kind, pk = scope
+    return f"pagecache:mtime:{kind}:{pk}"
+
+
+def _entry_key(scope, vary_on):
+    kind, pk = scope
+    vary = hashlib.md5(
+        ":".join(str(value) for value in vary_on).encode()
+    ).hexdigest()
+    return f"pagecache:page:{kind}:{pk}:{vary}"
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+def _generations(scopes, values):
+    generations = []
+    for scope in scopes:
+        key = _generation_key(scope)
+        if values.get(key) is None:
+            # Поколение начинается со времени, чтобы после вытеснения
+            # ключа старые записи не совпали с новым поколением.
+            cache.add(key, time.time_ns(), None)
+            cache.add(_modified_key(scope), time.time(), None)
+            values[key] = cache.get(key)
+        generations.append(values[key])
+    return tuple(generations)
+
+
+def bump(*scopes):
+    """Инвалидирует все записи указанных областей."""
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    now = time.time()
+    cache.set_many({_modified_key(scope): now for scope in scopes}, None)
+
+
+def version(scope):
+    """Поколения области и всего сайта: меняются при любой их правке."""
+    scopes = (SITE, scope)
+    values = cache.get_many([_generation_key(item) for item in scopes])
+    return _generations(scopes, values)
+
+
+def state(*scopes):
+    """Поколения областей и всего сайта и время последней их смены.
+
+    Время - datetime в UTC или None, если его ключ вытеснен из кеша.
+    """
+    scopes = (SITE, *scopes)
+    modified_keys = [_modified_key(scope) for scope in scopes]
+    values = cache.get_many(
+        [_generation_key(scope) for scope in scopes] + modified_keys
+    )
+    generations = _generations(scopes, values)
+    times = [values.get(key) or cache.get(key) for key in modified_keys]
+    if None in times:
+        return generations, None
+    return generations, datetime.fromtimestamp(max(times), timezone.utc)
+
+
+def fetch(scope, vary_on, compute):
+    """Возвращает HTML области из кеша или считает его через compute()."""
+    return "".join(stream(scope, vary_on, lambda: (compute(),)))
+
+
+def stream(scope, vary_on, render):
+    """Как fetch, но отдаёт HTML частями: render() - итератор частей.
+
+    При промахе части уходят клиенту по мере отрисовки и сохраняются в
+    кеш, только если отрисовка дошла до конца. Части-не строки (маркеры
+    потоковой отрисовки) передаются дальше, но в кеш не попадают.
+    """
+    scopes = (SITE, scope)
+    key = _entry_key(scope, vary_on)
+    values = cache.get_many(
+        [key] + [_generation_key(item) for item in scopes]
+    )
+    generations = _generations(scopes, values)
+    entry = values.get(key)
+    if entry is not None and entry[0] == generations:
+        _incr("pagecache:stats:hit")
+        yield entry[1]
+        return
+
+    lock = f"{key}:lock"
+    if cache.add(lock, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+        try:
+            parts = []
+            for part in render():
+                if isinstance(part, str):
+                    parts.append(part)
+                yield part
+            cache.set(key, (generations, "".join(parts)),
+                      settings.PAGE_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock)
+        _incr("pagecache:stats:miss")
+        return
+
+    if entry is not None:
+        _incr("pagecache:stats:stale")
+        yield entry[1]
+        return
+    _incr("pagecache:stats:miss")
+    yield from render()
+
+
+def stats():
+    values = cache.get_many([f"pagecache:stats:{name}" for name in STATS])
+    return {
+        name: values.get(f"pagecache:stats:{name}", 0) for name in STATS
+    }
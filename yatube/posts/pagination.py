@@ -0,0 +1,187 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def encode_cursor(obj, direction, field="pub_date"):
+    """Упаковывает позицию (дата, id) объекта в непрозрачную строку."""
+    raw = json.dumps([getattr(obj, field).isoformat(), obj.pk, direction])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Возвращает (дата, id, direction) или None для битого курсора."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk, direction = json.loads(raw)
+        pub_date = parse_datetime(pub_date)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+    if pub_date is None or not isinstance(pk, int):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    return pub_date, pk, direction
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации: вместо номеров - курсоры соседей."""
+
+    def __init__(self, object_list, paginator, cursor=None, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, 1, paginator)
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Cursor page {self.cursor or 'first'}>"
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (дата, id) без COUNT(*) и OFFSET.
+
+    object_list должен быть отсортирован по паре (field, id): от новых
+    к старым, как Meta.ordering у Post, или от старых к новым при
+    descending=False, как комментарии.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, field="pub_date",
+                 descending=True, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.field = field
+        self.descending = descending
+
+    def _beyond(self, value, pk, forward):
+        """Условие на строки после позиции (forward) или перед ней."""
+        lookup = "lt" if forward == self.descending else "gt"
+        return (Q(**{f"{self.field}__{lookup}": value})
+                | Q(**{self.field: value, f"pk__{lookup}": pk}))
+
+    def get_page(self, cursor, strict=False):
+        """Страница после курсора. Битый курсор или курсор за концом
+        выдачи дают первую страницу, а при strict - пустую."""
+        position = decode_cursor(cursor)
+        if strict and cursor and position is None:
+            return CursorPage([], self, cursor)
+        queryset = self.object_list
+        limit = self.per_page + 1
+
+        if position is None:
+            items = list(queryset[:limit])
+            has_more, has_newer = len(items) > self.per_page, False
+            items = items[:self.per_page]
+        else:
+            value, pk, direction = position
+            if direction == NEXT:
+                items = list(queryset.filter(
+                    self._beyond(value, pk, forward=True)
+                )[:limit])
+                has_more, has_newer = len(items) > self.per_page, True
+                items = items[:self.per_page]
+            else:
+                items = list(queryset.filter(
+                    self._beyond(value, pk, forward=False)
+                ).reverse()[:limit])
+                has_more, has_newer = True, len(items) > self.per_page
+                items = items[:self.per_page][::-1]
+
+        if position is None:
+            cursor = None
+        elif not items:
+            if strict:
+                return CursorPage([], self, cursor)
+            return self.get_page(None)
+
+        next_cursor = previous_cursor = None
+        if items and has_more:
+            next_cursor = encode_cursor(items[-1], NEXT, self.field)
+        if items and has_newer:
+            previous_cursor = encode_cursor(items[0], PREVIOUS, self.field)
+        return CursorPage(items, self, cursor, next_cursor, previous_cursor)
+
+
+def page_window(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации: первые и последние on_ends, соседи
+    текущей на on_each_side в каждую сторону и None на месте пропуска.
+
+    Длина окна не зависит от числа страниц. Пропуск ровно одной
+    страницы заменяется её номером: многоточие короче не станет.
+    """
+    shown = set(range(1, min(on_ends, num_pages) + 1))
+    shown.update(range(max(num_pages - on_ends + 1, 1), num_pages + 1))
+    shown.update(range(max(number - on_each_side, 1),
+                       min(number + on_each_side, num_pages) + 1))
+    window, previous = [], 0
+    for item in sorted(shown):
+        if item - previous == 2:
+            window.append(previous + 1)
+        elif item - previous > 2:
+            window.append(None)
+        window.append(item)
+        previous = item
+    return window
+
+
+class ApproximatePaginator(Paginator):
+    """Paginator, которому достаточно приблизительного count.
+
+    count - лишь нижняя граница для ссылок на страницы; сама страница
+    всегда берётся срезом на per_page строк, поэтому отставший count не
+    обрезает последнюю страницу и не прячет страницы за ней: номер за
+    оценённой последней страницей отдаётся, пока срез не пуст, а число
+    страниц поднимается до него. Завышенный count выдаёт себя пустой
+    страницей: тогда строки считаются точно через exact_count (по
+    умолчанию object_list.count) и отдаётся последняя непустая страница.
+    """
+
+    def __init__(self, object_list, per_page, exact_count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.exact_count = exact_count or object_list.count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            number = int(number)
+            if number < 1:
+                raise
+            return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        items = self.object_list[bottom:top]
+        if number > 1 and not items:
+            self.count = self.exact_count()
+            self.__dict__.pop("num_pages", None)
+            return self.page(self.num_pages)
+        if number >= self.num_pages:
+            # Последняя по count страница или дальше: count мог отстать.
+            # Число строк до конца среза известно точно, а если срез
+            # полон и за ним есть строки, добавляется ещё одна, чтобы
+            # вела ссылка на следующую страницу.
+            more = (len(items) == self.per_page
+                    and self.object_list[top:top + 1].exists())
+            self.count = bottom + len(items) + more
+            self.__dict__.pop("num_pages", None)
+        return self._get_page(items, number, self)
@@ -0,0 +1,173 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+MARK_START, MARK_END = "\x02", "\x03"
+SNIPPET_TOKENS = 32
+
+
+def terms(query):
+    return re.findall(r"\w+", query.lower())
+
+
+def highlight(text):
+    """Экранирует фрагмент и превращает маркеры совпадений в <mark>."""
+    return mark_safe(
+        escape(text).replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
+
+
+class SearchBackend:
+    """Интерфейс поискового индекса по тексту постов."""
+
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def rebuild(self, pk_range=None):
+        """Переиндексирует все посты или посты с ключами из pk_range
+        (первый, последний)."""
+        raise NotImplementedError
+
+    def count(self, query):
+        raise NotImplementedError
+
+    def search(self, query, offset, limit):
+        """Возвращает [(post_id, фрагмент с маркерами)] по релевантности."""
+        raise NotImplementedError
+
+
+class SqliteFTSBackend(SearchBackend):
+    """Инвертированный индекс на SQLite FTS5 (таблица из миграции)."""
+
+    table = "posts_post_fts"
+
+    def _match(self, query):
+        return " ".join(f'"{term}"*' for term in terms(query))
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s",
+                           [post.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, text) VALUES (%s, %s)",
+                [post.pk, post.text],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s",
+                           [post_id])
+
+    def rebuild(self, pk_range=None):
+        where, params = "", []
+        if pk_range is not None:
+            where, params = " WHERE {} BETWEEN %s AND %s", list(pk_range)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}"
+                           + where.format("rowid"), params)
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, text) "
+                f"SELECT id, text FROM {Post._meta.db_table}"
+                + where.format("id"), params
+            )
+            cursor.execute(
+                f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')"
+            )
+
+    def count(self, query):
+        match = self._match(query)
+        if not match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s",
+                [match],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query, offset, limit):
+        match = self._match(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({self.table}, 0, %s, %s, '…', %s) "
+                f"FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY rank LIMIT %s OFFSET %s",
+                [MARK_START, MARK_END, SNIPPET_TOKENS, match, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+class SimpleSearchBackend(SearchBackend):
+    """Поиск через LIKE для баз без полнотекстового индекса."""
+
+    def _queryset(self, query):
+        words = terms(query)
+        if not words:
+            return Post.objects.none()
+        posts = Post.objects.all()
+        for word in words:
+            posts = posts.filter(text__icontains=word)
+        return posts
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self, pk_range=None):
+        pass
+
+    def count(self, query):
+        return self._queryset(query).count()
+
+    def search(self, query, offset, limit):
+        pattern = re.compile(
+            "|".join(re.escape(word) for word in terms(query)), re.I
+        )
+        posts = self._queryset(query).values_list("id", "text")
+        return [
+            (pk, pattern.sub(lambda m: f"{MARK_START}{m[0]}{MARK_END}", text))
+            for pk, text in posts[offset:offset + limit]
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+class SearchResults:
+    """Ленивый список найденных постов для Paginator."""
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_backend()
+
+    def count(self):
+        return self.backend.count(self.query)
+
+    def __getitem__(self, index):
+        rows = self.backend.search(self.query, index.start,
+                                   index.stop - index.start)
+        posts = Post.objects.for_feed().in_bulk([pk for pk, _ in rows])
+        results = []
+        for pk, snippet in rows:
+            if pk in posts:
+                posts[pk].snippet = highlight(snippet)
+                results.append(posts[pk])
+        return results
@@ -0,0 +1,194 @@
+import contextvars
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, counts, feed, pagecache, search
+from .models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+def _count_scopes(group_id):
+    if group_id is None:
+        return (("index", 0),)
+    return (("index", 0), ("group", group_id))
+
+
+def _follower_feeds(author_id):
+    return [("follow", user_id) for user_id in
+            Follow.objects.filter(author_id=author_id)
+            .values_list("user_id", flat=True)]
+
+
+# Авторы, которых сейчас удаляют: ленты их подписчиков сбрасываются один
+# раз на автора, а не на каждый удаляемый каскадом пост.
+_deleting_authors = contextvars.ContextVar("deleting_authors",
+                                           default=frozenset())
+
+
+@receiver(pre_delete, sender=User)
+def forget_author_feeds(sender, instance, **kwargs):
+    feeds = _follower_feeds(instance.pk)
+    transaction.on_commit(lambda: counts.forget(*feeds))
+    _deleting_authors.set(_deleting_authors.get() | {instance.pk})
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_author(sender, instance, **kwargs):
+    _deleting_authors.set(_deleting_authors.get() - {instance.pk})
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_stats(instance.author_id, posts_count=1)
+        counts.change(1, *_count_scopes(instance.group_id))
+        follower_ids = feed.fan_out(instance)
+        counts.forget(*[("follow", user_id) for user_id in follower_ids])
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_stats(instance.author_id, posts_count=-1)
+    counts.change(-1, *_count_scopes(instance.group_id))
+    if instance.author_id not in _deleting_authors.get():
+        counts.forget(*_follower_feeds(instance.author_id))
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_stats(instance.author_id, followers_count=1)
+        counters.change_stats(instance.user_id, following_count=1)
+        feed.backfill(instance.user_id, instance.author_id)
+        counts.forget(("follow", instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def clean_feed(sender, instance, **kwargs):
+    counters.change_stats(instance.author_id, followers_count=-1)
+    counters.change_stats(instance.user_id, following_count=-1)
+    feed.remove(instance.user_id, instance.author_id)
+    counts.forget(("follow", instance.user_id))
+
+
+def _post_scopes(post_id, author_id, group_id):
+    return (("index", 0), ("group", group_id), ("profile", author_id),
+            ("post", post_id))
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._saved_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list("group_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def move_group_count(sender, instance, created, raw=False, **kwargs):
+    saved_group_id = getattr(instance, "_saved_group_id", None)
+    if created or raw or saved_group_id == instance.group_id:
+        return
+    if saved_group_id is not None:
+        counts.change(-1, ("group", saved_group_id))
+    if instance.group_id is not None:
+        counts.change(1, ("group", instance.group_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    pagecache.bump(
+        ("group", getattr(instance, "_saved_group_id", None)),
+        *_post_scopes(instance.pk, instance.author_id, instance.group_id)
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    post = Post.objects.filter(pk=instance.post_id).values_list(
+        "author_id", "group_id"
+    ).first()
+    if post is not None:
+        pagecache.bump(*_post_scopes(instance.post_id, *post))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    pagecache.bump(pagecache.SITE)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def touch_group_posts(sender, instance, raw=False, **kwargs):
+    # Карточки постов кешируются по дате изменения поста.
+    if not raw:
+        Post.objects.filter(group=instance).update(updated=timezone.now())
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    if raw or not instance.pk or (update_fields is not None
+                                  and "username" not in update_fields):
+        return
+    instance._saved_username = (
+        User.objects.filter(pk=instance.pk)
+        .values_list("username", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, raw=False, **kwargs):
+    saved_username = getattr(instance, "_saved_username", None)
+    if created or raw or saved_username in (None, instance.username):
+        return
+    # Имя автора есть в карточках его постов и в комментариях на любых
+    # страницах: переименование случается редко, сбрасывается всё.
+    Post.objects.filter(author=instance).update(updated=timezone.now())
+    pagecache.bump(pagecache.SITE)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    pagecache.bump(("profile", instance.author_id),
+                   ("profile", instance.user_id))
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and "text" not in update_fields):
+        return
+    search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
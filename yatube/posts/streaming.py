@@ -0,0 +1,170 @@
+"""Потоковая отрисовка страниц лент.
+
+render() отдаёт StreamingHttpResponse, который рисует шаблон по узлам:
+шапка страницы уходит клиенту раньше, чем выполнен запрос ленты, а
+карточки постов - пачками по мере отрисовки. Узлы {% extends %},
+{% block %}, {% for %} и {% pagecache %} раскрываются, остальные
+рисуются целиком. Перед циклом и кешируемым фрагментом, где и
+считается лента, накопленный HTML отправляется сразу.
+"""
+import contextvars
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template import loader
+from django.template.base import Template, TextNode
+from django.template.context import make_context
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import (BLOCK_CONTEXT_KEY, BlockContext,
+                                         BlockNode, ExtendsNode)
+
+FLUSH = object()
+
+
+def render(request, template_name, context=None, content_type=None,
+           status=None):
+    """Аналог django.shortcuts.render с потоковым ответом."""
+    template = loader.get_template(template_name)
+    # Обёртки бэкенда и TimedTemplate из metrics снимаются до самого
+    # шаблона Django: рисовать по узлам умеет только он.
+    while not isinstance(template, Template):
+        template = template.template
+    chunks = _buffered(_render_template(template,
+                                        make_context(context, request)))
+    # Контекст снимается здесь, внутри представления: тело генератора
+    # выполнится только при первом next(), когда middleware уже вернули
+    # свои ContextVar (например, чтение из реплики) к исходным значениям.
+    return StreamingHttpResponse(
+        _in_context(chunks, contextvars.copy_context()),
+        content_type=content_type, status=status,
+    )
+
+
+def _in_context(chunks, context):
+    """Отрисовывает части в снятом контексте запроса."""
+    while True:
+        try:
+            chunk = context.run(next, chunks)
+        except StopIteration:
+            return
+        yield chunk
+
+
+def _buffered(parts):
+    """Склеивает мелкие части в куски от STREAMING_CHUNK_SIZE символов;
+    FLUSH отправляет накопленное сразу."""
+    buffer, size = [], 0
+    for part in parts:
+        if part is not FLUSH:
+            buffer.append(part)
+            size += len(part)
+        if buffer and (part is FLUSH
+                       or size >= settings.STREAMING_CHUNK_SIZE):
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _render_template(template, context):
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            yield from iter_nodes(template.nodelist, context)
+
+
+def iter_nodes(nodelist, context):
+    """Части HTML узлов nodelist; может отдавать FLUSH."""
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from _iter_extends(node, context)
+        elif isinstance(node, BlockNode):
+            yield from _iter_block(node, context)
+        elif isinstance(node, ForNode):
+            yield FLUSH
+            yield from _iter_for(node, context)
+        elif hasattr(node, "stream"):
+            yield FLUSH
+            yield from node.stream(context)
+        else:
+            yield node.render_annotated(context)
+
+
+def _iter_extends(node, context):
+    """ExtendsNode.render, но родительский шаблон рисуется по частям."""
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block
+                    for block in parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from iter_nodes(parent.nodelist, context)
+
+
+def _iter_block(node, context):
+    """BlockNode.render по частям."""
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context["block"] = node
+            yield from iter_nodes(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context["block"] = block
+        yield from iter_nodes(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def _unpack(loopvars, item):
+    try:
+        length = len(item)
+    except TypeError:
+        length = 1
+    if len(loopvars) != length:
+        raise ValueError(f"Need {len(loopvars)} values to unpack in for "
+                         f"loop; got {length}. ")
+    return dict(zip(loopvars, item))
+
+
+def _iter_for(node, context):
+    """ForNode.render, но каждая итерация отдаётся отдельной частью."""
+    parentloop = context["forloop"] if "forloop" in context else {}
+    with context.push():
+        values = node.sequence.resolve(context, ignore_failures=True)
+        if values is None:
+            values = []
+        if not hasattr(values, "__len__"):
+            values = list(values)
+        length = len(values)
+        if length < 1:
+            yield node.nodelist_empty.render(context)
+            return
+        if node.is_reversed:
+            values = reversed(values)
+        unpack = len(node.loopvars) > 1
+        loop = context["forloop"] = {"parentloop": parentloop}
+        for index, item in enumerate(values):
+            loop.update(counter0=index, counter=index + 1,
+                        revcounter=length - index,
+                        revcounter0=length - index - 1,
+                        first=index == 0, last=index == length - 1)
+            if unpack:
+                context.update(_unpack(node.loopvars, item))
+            else:
+                context[node.loopvars[0]] = item
+            yield "".join(loop_node.render_annotated(context)
+                          for loop_node in node.nodelist_loop)
+            if unpack:
+                context.pop()
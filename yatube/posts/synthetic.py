@@ -0,0 +1,318 @@
+"""Синтетические данные для нагрузочных замеров.
+
+Строки каждой таблицы нумеруются с единицы; первичный ключ строки — её
+номер плюс сдвиг таблицы, поэтому набор можно догрузить и в непустую
+базу. Содержимое куска строк зависит только от seed, размера куска и
+номера его первой строки, так что набор одинаков при любом числе
+процессов и любом порядке загрузки кусков.
+
+Активность распределена по Ципфу: первые пользователи пишут больше всех
+и собирают больше всех подписчиков, первые группы самые населённые, к
+первым постам приходит больше всего комментариев. Показатель 0 даёт
+равномерное распределение.
+"""
+import multiprocessing
+import random
+from datetime import timedelta
+from functools import lru_cache
+from io import BytesIO
+from itertools import accumulate
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from . import counters, counts, feed, pagecache, search
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SCALES = {
+    "tiny": {"users": 50, "groups": 5, "posts": 500,
+             "comments": 1_000, "follows": 200},
+    "small": {"users": 1_000, "groups": 20, "posts": 50_000,
+              "comments": 100_000, "follows": 20_000},
+    "medium": {"users": 10_000, "groups": 100, "posts": 500_000,
+               "comments": 1_000_000, "follows": 200_000},
+    "large": {"users": 100_000, "groups": 500, "posts": 5_000_000,
+              "comments": 10_000_000, "follows": 2_000_000},
+}
+TABLES = ("users", "groups", "posts", "comments", "follows")
+MODELS = {"users": User, "groups": Group, "posts": Post,
+          "comments": Comment, "follows": Follow}
+# Показатели Ципфа: кто пишет посты, в какие группы, к каким постам
+# приходят комментарии и на кого подписываются.
+EXPONENTS = {"authors": 1.1, "groups": 1.0, "comments": 1.2,
+             "follows": 1.3}
+PLACEHOLDERS = 8
+WORDS = (
+    "утро", "город", "море", "книга", "дорога", "дождь", "кофе", "лес",
+    "письмо", "друг", "песня", "вечер", "окно", "ветер", "история",
+    "поезд", "солнце", "сад", "мост", "река", "снег", "лето", "память",
+    "тишина", "свет", "дом", "небо", "мечта", "путь", "звезда",
+)
+
+
+@lru_cache(maxsize=8)
+def _cum_weights(count, exponent):
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+def _insert_raw(model, rows, ignore_conflicts=False):
+    """bulk_create, который пишет даты auto_now/auto_now_add как есть.
+
+    Как и loaddata, вставка идёт в режиме raw: pre_save полей не
+    вызывается, а сами поля модели остаются нетронутыми.
+    """
+    fields = model._meta.concrete_fields
+    size = max(connection.ops.bulk_batch_size(fields, rows), 1)
+    for start in range(0, len(rows), size):
+        model._base_manager._insert(rows[start:start + size], fields=fields,
+                                    raw=True,
+                                    ignore_conflicts=ignore_conflicts)
+
+
+def current_offsets():
+    """Сдвиги ключей, чтобы новые строки не пересеклись с имеющимися."""
+    return {
+        table: model.objects.aggregate(last=Max("pk"))["last"] or 0
+        for table, model in MODELS.items()
+    }
+
+
+def username(pk):
+    return f"user{pk}"
+
+
+def taken_usernames(plan):
+    """Имена из набора, которые уже заняты пользователями базы."""
+    first, last = plan.key_range("users")
+    taken = User.objects.filter(
+        username__regex=r"^user[0-9]+$"
+    ).values_list("username", flat=True)
+    return sorted(name for name in taken.iterator()
+                  if first <= int(name[4:]) <= last)
+
+
+def placeholder_name(number):
+    return f"posts/seed/placeholder-{number}.jpg"
+
+
+def ensure_placeholders():
+    """Кладёт в хранилище картинки-заглушки для постов с картинками."""
+    rng = random.Random("placeholders")
+    for number in range(PLACEHOLDERS):
+        name = placeholder_name(number)
+        if default_storage.exists(name):
+            continue
+        color = tuple(rng.randrange(64, 256) for _ in range(3))
+        buffer = BytesIO()
+        Image.new("RGB", (960, 339), color).save(buffer, "JPEG")
+        default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class Plan:
+    """Размеры и распределения синтетического набора."""
+
+    def __init__(self, users, groups, posts, comments, follows, seed=0,
+                 days=365, exponents=None, group_share=0.7, image_share=0.0,
+                 offsets=None, now=None):
+        self.counts = {"users": users, "groups": groups, "posts": posts,
+                       "comments": comments, "follows": follows}
+        self.seed = seed
+        self.days = days
+        self.exponents = {**EXPONENTS, **(exponents or {})}
+        self.group_share = group_share
+        self.image_share = image_share
+        self.offsets = {table: 0 for table in TABLES}
+        self.offsets.update(offsets or {})
+        self.now = now or timezone.now().replace(microsecond=0)
+
+    @classmethod
+    def for_scale(cls, scale, **options):
+        return cls(**{**SCALES[scale], **options})
+
+    def describe(self):
+        return {**self.counts, "seed": self.seed, "days": self.days,
+                "exponents": self.exponents, "group_share": self.group_share,
+                "image_share": self.image_share}
+
+    def key_range(self, table):
+        """Первый и последний ключи строк таблицы из набора."""
+        offset = self.offsets[table]
+        return offset + 1, offset + self.counts[table]
+
+    def rows(self, table):
+        """Строки таблицы из набора."""
+        return MODELS[table].objects.filter(pk__range=self.key_range(table))
+
+    def chunks(self, table, size):
+        """Куски строк таблицы: пары (первый номер, номер после последнего)."""
+        total = self.counts[table]
+        for start in range(1, total + 1, size):
+            yield start, min(start + size, total + 1)
+
+    def _rng(self, table, start):
+        return random.Random(f"{self.seed}:{table}:{start}")
+
+    def _pick(self, rng, table, relation, k):
+        """Ключи k строк table, выбранных по Ципфу для связи relation."""
+        count = self.counts[table]
+        if not count:
+            return [None] * k
+        picked = rng.choices(
+            range(count), k=k,
+            cum_weights=_cum_weights(count, self.exponents[relation]),
+        )
+        return [self.offsets[table] + index + 1 for index in picked]
+
+    def _uniform(self, rng, table):
+        return self.offsets[table] + rng.randint(1, self.counts[table])
+
+    def post_date(self, number):
+        """Посты идут равномерно за days дней в порядке номеров."""
+        span = timedelta(days=self.days)
+        return self.now - span + span * number / self.counts["posts"]
+
+    def build(self, table, start, stop):
+        rng = self._rng(table, start)
+        offset = self.offsets[table]
+        return getattr(self, f"_{table}")(
+            rng, range(start, stop), range(offset + start, offset + stop)
+        )
+
+    def _users(self, rng, numbers, keys):
+        return [User(pk=pk, username=username(pk), password="!",
+                     date_joined=self.now - timedelta(days=self.days))
+                for pk in keys]
+
+    def _groups(self, rng, numbers, keys):
+        return [Group(pk=pk, title=f"Группа {pk}", slug=f"group-{pk}",
+                      description=self._text(rng, 5, 20))
+                for pk in keys]
+
+    def _posts(self, rng, numbers, keys):
+        authors = self._pick(rng, "users", "authors", len(keys))
+        groups = self._pick(rng, "groups", "groups", len(keys))
+        posts = []
+        for number, pk, author_id, group_id in zip(numbers, keys, authors,
+                                                   groups):
+            pub_date = self.post_date(number)
+            if rng.random() >= self.group_share:
+                group_id = None
+            image = ""
+            if rng.random() < self.image_share:
+                image = placeholder_name(rng.randrange(PLACEHOLDERS))
+            posts.append(Post(pk=pk, author_id=author_id, group_id=group_id,
+                              text=self._text(rng, 5, 60), image=image,
+                              pub_date=pub_date, updated=pub_date))
+        return posts
+
+    def _comments(self, rng, numbers, keys):
+        posts = self._pick(rng, "posts", "comments", len(keys))
+        return [
+            Comment(pk=pk, post_id=post_id,
+                    author_id=self._uniform(rng, "users"),
+                    text=self._text(rng, 2, 20),
+                    created=self.post_date(post_id - self.offsets["posts"])
+                    + timedelta(minutes=rng.randint(1, 2 * 24 * 60)))
+            for pk, post_id in zip(keys, posts)
+        ]
+
+    def _follows(self, rng, numbers, keys):
+        authors = self._pick(rng, "users", "follows", len(keys))
+        follows = []
+        for pk, author_id in zip(keys, authors):
+            user_id = self._uniform(rng, "users")
+            if user_id != author_id:
+                follows.append(Follow(pk=pk, user_id=user_id,
+                                      author_id=author_id))
+        return follows
+
+    def _text(self, rng, low, high):
+        return " ".join(rng.choices(WORDS, k=rng.randint(low, high))
+                        ).capitalize()
+
+
+def insert_rows(table, rows):
+    """Вставляет строки одной транзакцией, отдаёт (таблица, число строк)."""
+    model = MODELS[table]
+    with transaction.atomic():
+        # Повторные пары подписчик-автор просто пропускаются.
+        _insert_raw(model, rows, ignore_conflicts=table == "follows")
+    return table, len(rows)
+
+
+def _build_chunk(job):
+    plan, table, start, stop = job
+    return table, plan.build(table, start, stop)
+
+
+def _load_chunk(job):
+    return insert_rows(*_build_chunk(job))
+
+
+def finalize(plan):
+    """Достраивает то, что обычно делают сигналы: счётчики, ленты, поиск.
+
+    Строки набора ссылаются только друг на друга, поэтому пересчёт
+    ограничен ими и не трогает остальную базу.
+    """
+    users = plan.rows("users").values("pk")
+    counters.reconcile(users=users, posts=plan.rows("posts"))
+    feed.rebuild(users)
+    search.get_backend().rebuild(plan.key_range("posts"))
+    # Новых групп, профилей и лент в кеше ещё нет; устаревает только
+    # главная и число постов на ней.
+    pagecache.bump(("index", 0))
+    counts.forget(("index", 0))
+
+
+def generate(plan, batch_size=5_000, workers=1, progress=None):
+    """Загружает набор кусками, в workers процессов.
+
+    Таблицы грузятся по очереди, чтобы внешние ключи указывали на уже
+    вставленные строки; куски одной таблицы идут параллельно. SQLite
+    пускает только одного писателя, поэтому с ней процессы лишь строят
+    строки, а вставляет их основной процесс. Если имена пользователей
+    набора уже заняты, ничего не грузит и бросает ValueError.
+    """
+    taken = taken_usernames(plan)
+    if taken:
+        raise ValueError("Имена пользователей уже заняты: "
+                         + ", ".join(taken[:5]))
+    if plan.image_share:
+        ensure_placeholders()
+    pool = None
+    parallel_writes = connection.vendor != "sqlite"
+    if workers > 1:
+        # Открытое соединение нельзя делить с дочерними процессами.
+        connections.close_all()
+        pool = multiprocessing.Pool(workers, initializer=django.setup)
+    try:
+        for table in TABLES:
+            jobs = [(plan, table, start, stop)
+                    for start, stop in plan.chunks(table, batch_size)]
+            if pool is None:
+                loaded = map(_load_chunk, jobs)
+            elif parallel_writes:
+                loaded = pool.imap_unordered(_load_chunk, jobs)
+            else:
+                loaded = (insert_rows(*chunk) for chunk
+                          in pool.imap_unordered(_build_chunk, jobs))
+            done = 0
+            for _, rows in loaded:
+                done += rows
+                if progress is not None:
+                    progress(table, done, plan.counts[table])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finalize(plan)
@@ -0,0 +1,46 @@
+from django import template
+
+from posts import pagecache, streaming  # type: ignore
+
+register = template.Library()
+
+
+class PageCacheNode(template.Node):
+    def __init__(self, nodelist, kind, pk, vary_on):
+        self.nodelist = nodelist
+        self.kind = kind
+        self.pk = pk
+        self.vary_on = vary_on
+
+    def _key(self, context):
+        scope = (self.kind.resolve(context), self.pk.resolve(context))
+        return scope, [var.resolve(context) for var in self.vary_on]
+
+    def render(self, context):
+        return pagecache.fetch(*self._key(context),
+                               lambda: self.nodelist.render(context))
+
+    def stream(self, context):
+        """Части фрагмента для потоковой отрисовки."""
+        return pagecache.stream(
+            *self._key(context),
+            lambda: streaming.iter_nodes(self.nodelist, context),
+        )
+
+
+@register.tag("pagecache")
+def do_pagecache(parser, token):
+    """{% pagecache "group" group.pk page user.pk %}...{% endpagecache %}
+
+    Первые два аргумента задают область инвалидации, остальные - ключ
+    записи внутри области.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 2 arguments."
+        )
+    nodelist = parser.parse(("endpagecache",))
+    parser.delete_first_token()
+    kind, pk, *vary_on = [parser.compile_filter(bit) for bit in bits[1:]]
+    return PageCacheNode(nodelist, kind, pk, vary_on)
@@ -0,0 +1,14 @@
+from django import template
+from django.conf import settings
+
+from posts.pagination import page_window as window  # type: ignore
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page):
+    """{% page_window page as numbers %}: окно номеров вокруг текущей
+    страницы вместо полного page_range, None на месте пропуска."""
+    return window(page.number, page.paginator.num_pages,
+                  settings.PAGINATOR_ON_EACH_SIDE, settings.PAGINATOR_ON_ENDS)
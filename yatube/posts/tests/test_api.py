@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post  # type: ignore
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_api_author')
+        cls.reader = User.objects.create_user(username='test_api_reader')
+        cls.group = Group.objects.create(title='API', slug='test-api')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.posts = [
+            Post.objects.create(text=f'Пост для API {item}',
+                                author=cls.author, group=cls.group)
+            for item in range(5)
+        ]
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(ApiTests.reader)
+        cache.clear()
+
+    def test_feeds_list_posts(self):
+        """Все ленты отдают посты в JSON от новых к старым."""
+        expected = [post.pk for post in reversed(ApiTests.posts)]
+        for client, url in (
+            (self.guest_client, reverse('api_index')),
+            (self.guest_client,
+             reverse('api_group_posts', args=(ApiTests.group.slug,))),
+            (self.guest_client,
+             reverse('api_profile', args=(ApiTests.author.username,))),
+            (self.reader_client, reverse('api_follow_index')),
+        ):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                ids = [post['id'] for post in response.json()['results']]
+                self.assertEqual(ids, expected)
+
+    def test_cursor_and_sparse_fields(self):
+        """Курсор листает ленту, fields оставляет только нужные поля."""
+        url = reverse('api_index')
+        first = self.guest_client.get(url, {'limit': 3, 'fields': 'id,text'})
+        data = first.json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        second = self.guest_client.get(
+            url, {'limit': 3, 'cursor': data['next']}
+        ).json()
+        ids = [post['id'] for post in data['results'] + second['results']]
+        self.assertEqual(ids, [post.pk for post in reversed(ApiTests.posts)])
+        self.assertIsNone(second['next'])
+
+        response = self.guest_client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_and_comments(self):
+        """Пост и его комментарии, комментарии от старых к новым."""
+        post = ApiTests.posts[0]
+        for item in range(3):
+            post.comments.create(text=f'Комментарий {item}',
+                                 author=ApiTests.reader)
+        response = self.guest_client.get(reverse('api_post', args=(post.pk,)))
+        self.assertEqual(response.json()['comment_count'], 3)
+        response = self.guest_client.get(
+            reverse('api_comments', args=(post.pk,)), {'limit': 2}
+        )
+        data = response.json()
+        self.assertEqual([item['text'] for item in data['results']],
+                         ['Комментарий 0', 'Комментарий 1'])
+        rest = self.guest_client.get(
+            reverse('api_comments', args=(post.pk,)), {'cursor': data['next']}
+        ).json()
+        self.assertEqual([item['text'] for item in rest['results']],
+                         ['Комментарий 2'])
+
+    def test_errors_are_json(self):
+        """Ошибки API приходят в JSON."""
+        response = self.guest_client.get(reverse('api_post', args=(0,)))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('detail', response.json())
+        response = self.guest_client.get(reverse('api_follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Повторный запрос без изменений получает 304 без запроса ленты."""
+        url = reverse('api_index')
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        ApiTests.posts[0].comments.create(text='Новый комментарий',
+                                          author=ApiTests.reader)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_group_is_looked_up_once(self):
+        """Валидаторы и представление ищут группу одним запросом."""
+        url = reverse('api_group_posts', args=(ApiTests.group.slug,))
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(2):
+            self.guest_client.get(url)
+
+    def test_post_is_looked_up_once(self):
+        """Валидаторы и представление поста читают пост одним запросом."""
+        url = reverse('api_post', args=(ApiTests.posts[0].pk,))
+        self.guest_client.get(url)
+        with self.assertNumQueries(1):
+            self.guest_client.get(url)
+
+    def test_follow_feed_etag_follows_changes(self):
+        """ETag ленты подписок меняется с правкой поста из неё."""
+        url = reverse('api_follow_index')
+        etag = self.reader_client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        post = ApiTests.posts[0]
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        """Last-Modified совпадает с датой самого свежего поста."""
+        url = reverse('api_index')
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts import benchmark, synthetic  # type: ignore
+from posts.models import AuthorStats, Comment, FeedItem, Post  # type: ignore
+
+User = get_user_model()
+
+
+class BenchmarkTests(TestCase):
+
+    def plan(self, **options):
+        return synthetic.Plan(users=10, groups=2, posts=40, comments=60,
+                              follows=20, seed=1, **options)
+
+    def test_plan_is_reproducible(self):
+        """Содержимое куска зависит только от seed и номеров строк."""
+        first, second = self.plan(), self.plan(now=self.plan().now)
+        for table in synthetic.TABLES:
+            rows = [(row.pk, getattr(row, 'text', None))
+                    for row in first.build(table, 1, 11)]
+            again = [(row.pk, getattr(row, 'text', None))
+                     for row in second.build(table, 1, 11)]
+            with self.subTest(table=table):
+                self.assertEqual(rows, again)
+
+    def test_generate_and_run(self):
+        """Набор грузится со счётчиками и лентами, замеры идут по лентам."""
+        plan = self.plan()
+        synthetic.generate(plan, batch_size=7)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 60)
+        self.assertEqual(AuthorStats.objects.count(), 10)
+        self.assertTrue(FeedItem.objects.exists())
+        self.assertEqual(
+            Post.objects.order_by('pk').first().pub_date, plan.post_date(1)
+        )
+
+        results = benchmark.run(repeat=1, deep_page=2)
+        self.assertEqual(
+            {row['view'] for row in results},
+            {'index', 'group_posts', 'profile', 'post', 'follow_index'},
+        )
+        for row in results:
+            if row['cache'] == 'cold':
+                with self.subTest(view=row['view'], depth=row['depth']):
+                    self.assertGreater(row['queries'], 0)
+
+        data = benchmark.report(plan, results)
+        changes = benchmark.compare(data, data)
+        self.assertEqual(len(changes), len(results))
+        self.assertTrue(all(row['p50_change'] == 0 for row in changes))
+
+    def test_generate_keeps_existing_rows(self):
+        """Догрузка не трогает счётчики и ленты имевшихся строк."""
+        author = User.objects.create_user(username='test_seed_author')
+        Post.objects.create(text='Свой пост', author=author)
+        AuthorStats.objects.filter(user=author).update(posts_count=7)
+        plan = self.plan(offsets=synthetic.current_offsets())
+        synthetic.generate(plan, batch_size=50)
+        self.assertEqual(AuthorStats.objects.get(user=author).posts_count, 7)
+        self.assertEqual(plan.rows('posts').count(), 40)
+
+    def test_generate_refuses_taken_usernames(self):
+        """Набор не грузится, если его имена уже заняты."""
+        User.objects.create_user(username='user3')
+        with self.assertRaisesMessage(ValueError, 'user3'):
+            synthetic.generate(self.plan(), batch_size=50)
+        self.assertFalse(Post.objects.exists())
+
+    def test_streaming_pages(self):
+        synthetic.generate(self.plan(), batch_size=50)
+        results = benchmark.streaming_pages(repeat=1)
+        self.assertEqual(len(results), 4 * len(benchmark.STREAMING_MODES))
+        sizes = {(row['view'], row['mode']): row['bytes'] for row in results}
+        for view in ('index', 'group_posts', 'profile', 'follow_index'):
+            with self.subTest(view=view):
+                self.assertLess(sizes[view, 'gzip'], sizes[view, 'render'])
+                self.assertLess(sizes[view, 'stream+gzip'],
+                                sizes[view, 'render'])
+
+    def test_compare_profiles(self):
+        """Профили сравниваются с первым по каждой странице."""
+        results = [
+            {'profile': 'dev', 'view': 'index', 'p50_ms': 20.0},
+            {'profile': 'dev', 'view': 'post', 'p50_ms': 10.0},
+            {'profile': 'prod', 'view': 'index', 'p50_ms': 5.0},
+            {'profile': 'prod', 'view': 'post', 'p50_ms': 12.0},
+        ]
+        changes = {(row['profile'], row['view']): row['p50_change']
+                   for row in benchmark.compare_profiles(results)}
+        self.assertEqual(changes, {
+            ('dev', 'index'): 0.0, ('dev', 'post'): 0.0,
+            ('prod', 'index'): -75.0, ('prod', 'post'): 20.0,
+        })
+
+    def test_profile_environ(self):
+        environ = benchmark.profile_environ('prod', '/tmp/bench.sqlite3')
+        self.assertEqual(environ['YATUBE_SETTINGS'], 'prod')
+        self.assertEqual(environ['YATUBE_DB_NAME'], '/tmp/bench.sqlite3')
+        self.assertEqual(environ['DJANGO_SETTINGS_MODULE'], 'yatube.settings')
+        self.assertIn('YATUBE_SECRET_KEY', environ)
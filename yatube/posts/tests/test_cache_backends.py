@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.test import override_settings, SimpleTestCase
+
+from posts import pagecache  # type: ignore
+from yatube.cache_backends import SQLiteCache, TwoTierCache  # type: ignore
+
+TEMP_DIR = tempfile.mkdtemp()
+SHARED_PATH = os.path.join(TEMP_DIR, 'shared.sqlite3')
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'yatube.cache_backends.TwoTierCache',
+        'LOCATION': 'test-default',
+        'OPTIONS': {'SHARED': 'shared', 'MAX_ENTRIES': 100,
+                    'LOCAL_KEYS': ['pagecache:page:', 'local:']},
+    },
+    'shared': {
+        'BACKEND': 'yatube.cache_backends.SQLiteCache',
+        'LOCATION': SHARED_PATH,
+    },
+}
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+def _increment(path, times):
+    cache = SQLiteCache(path, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+def _tier(location, **options):
+    """Кеш «другого процесса»: свой LRU, общий уровень тот же."""
+    return TwoTierCache(location, {'OPTIONS': {
+        'SHARED': 'shared', 'MAX_ENTRIES': 10,
+        'LOCAL_KEYS': ['local:'], 'CHECK_INTERVAL': 0, **options,
+    }})
+
+
+class SQLiteCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(dir=TEMP_DIR),
+                                 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def test_basic_operations(self):
+        cache = self.cache
+        cache.set('key', {'value': 1})
+        self.assertEqual(cache.get('key'), {'value': 1})
+        self.assertFalse(cache.add('key', 'другое'))
+        self.assertTrue(cache.add('new', 'значение'))
+        self.assertEqual(cache.get_many(['key', 'new', 'missing']),
+                         {'key': {'value': 1}, 'new': 'значение'})
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+        self.assertTrue(cache.has_key('new'))
+        cache.clear()
+        self.assertEqual(cache.get('new', 'нет'), 'нет')
+
+    def test_expired_entries_are_missing(self):
+        self.cache.set('key', 'value', 0.05)
+        self.assertEqual(self.cache.get('key'), 'value')
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_incr_missing_key_raises(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0, None)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=_increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_cull_keeps_max_entries(self):
+        cache = SQLiteCache(self.path, {'OPTIONS': {'MAX_ENTRIES': 10}})
+        for number in range(20):
+            cache.set(f'key{number}', number)
+        cache._cull()
+        remaining = cache.get_many([f'key{number}' for number in range(20)])
+        self.assertLessEqual(len(remaining), 14)
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.first = _tier(f'first-{self.id()}')
+        self.second = _tier(f'second-{self.id()}')
+
+    def test_local_tier_serves_repeated_reads(self):
+        self.first.set('local:key', 'старое')
+        # Запись мимо двухуровневого кеша версию не меняет: процесс
+        # продолжает отдавать свою копию.
+        caches['shared'].set('local:key', 'в обход')
+        self.assertEqual(self.first.get('local:key'), 'старое')
+
+    def test_write_in_other_process_invalidates_local_copy(self):
+        self.first.set('local:key', 'старое')
+        self.assertEqual(self.first.get('local:key'), 'старое')
+        self.second.set('local:key', 'новое')
+        self.assertEqual(self.first.get('local:key'), 'новое')
+        self.second.delete('local:key')
+        self.assertIsNone(self.first.get('local:key'))
+
+    def test_clear_in_other_process_invalidates_local_copy(self):
+        self.first.set('local:key', 'значение')
+        self.second.clear()
+        self.assertIsNone(self.first.get('local:key'))
+
+    def test_other_keys_are_always_shared(self):
+        self.first.set('counter', 1)
+        caches['shared'].set('counter', 2)
+        self.assertEqual(self.first.get('counter'), 2)
+        self.second.incr('counter')
+        self.assertEqual(self.first.get('counter'), 3)
+
+    def test_check_interval_bounds_staleness(self):
+        first = _tier(f'interval-{self.id()}', CHECK_INTERVAL=60)
+        first.set('local:key', 'старое')
+        first.get('local:key')
+        self.second.set('local:key', 'новое')
+        self.assertEqual(first.get('local:key'), 'старое')
+        # Любое обращение к общему кешу заодно сверяет версию.
+        first.get('counter')
+        self.assertEqual(first.get('local:key'), 'новое')
+
+    def test_write_keeps_copies_from_other_buckets(self):
+        first = _tier(f'buckets-{self.id()}', BUCKETS=2)
+        second = _tier(f'buckets-second-{self.id()}', BUCKETS=2)
+        keys = [f'local:{number}' for number in range(10)]
+        changed = keys[0]
+        kept = [key for key in keys
+                if first._bucket(key) != first._bucket(changed)]
+        self.assertTrue(kept)
+        first.set_many({key: 'старое' for key in keys})
+        first.get_many(keys)
+        second.set(changed, 'новое')
+        self.assertEqual(first.get(changed), 'новое')
+        for key in kept:
+            self.assertIn((key, None), first._tier.entries)
+
+    def test_versions_are_checked_once_a_second_by_default(self):
+        tier = TwoTierCache('default-interval', {'OPTIONS': {}})
+        self.assertEqual(tier.check_interval, 1)
+
+    def test_lru_evicts_oldest_entries(self):
+        for number in range(11):
+            self.first.set(f'local:{number}', number)
+        tier = self.first._tier
+        self.assertNotIn(('local:0', None), tier.entries)
+        self.assertIn(('local:10', None), tier.entries)
+
+    def test_page_cache_is_invalidated_across_processes(self):
+        scope = ('group', 1)
+        self.assertEqual(pagecache.fetch(scope, [1], lambda: 'v1'), 'v1')
+        self.assertEqual(pagecache.fetch(scope, [1], lambda: 'v2'), 'v1')
+        # Другой процесс увеличил поколение группы в общем кеше.
+        caches['shared'].incr(pagecache._generation_key(scope))
+        self.assertEqual(pagecache.fetch(scope, [1], lambda: 'v2'), 'v2')
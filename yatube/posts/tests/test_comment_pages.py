@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.query import QuerySet
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post  # type: ignore
+from posts.pagination import encode_cursor, NEXT  # type: ignore
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=5)
+class CommentPageTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_thread_author')
+        cls.reader = User.objects.create_user(username='test_thread_reader')
+        cls.post = Post.objects.create(text='Пост с обсуждением',
+                                       author=cls.author)
+        cls.quiet_post = Post.objects.create(text='Пост без обсуждения',
+                                             author=cls.author)
+        for number in range(12):
+            Comment.objects.create(post=cls.post, author=cls.reader,
+                                   text=f'Комментарий {number}')
+        Comment.objects.create(post=cls.quiet_post, author=cls.reader,
+                               text='Единственный комментарий')
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def post_url(self, post):
+        return reverse('post', args=(post.author.username, post.pk))
+
+    def more_url(self, post, cursor):
+        url = reverse('post_comments', args=(post.author.username, post.pk))
+        return f'{url}?cursor={cursor}'
+
+    def test_post_page_shows_first_chunk(self):
+        response = self.client.get(self.post_url(CommentPageTests.post))
+        page = response.context['comment_page']
+        self.assertEqual([item.text for item in page],
+                         [f'Комментарий {number}' for number in range(5)])
+        self.assertTrue(page.has_next())
+        self.assertIsInstance(response.context['comments'], QuerySet)
+        self.assertContains(response, 'Показать ещё комментарии')
+        self.assertNotContains(response, 'Комментарий 5')
+
+    def test_query_count_does_not_depend_on_comment_count(self):
+        """Пост с дюжиной комментариев стоит столько же, сколько с одним."""
+        counts = []
+        for post in (CommentPageTests.quiet_post, CommentPageTests.post):
+            cache.clear()
+            with self.assertNumQueries(2) as queries:
+                self.client.get(self.post_url(post))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_comment_page_is_cut_from_context_comments(self):
+        """Порция берётся из того же queryset, что лежит в контексте."""
+        response = self.client.get(self.post_url(CommentPageTests.post))
+        self.assertIs(response.context['comment_page'].paginator.object_list,
+                      response.context['comments'])
+
+    def test_load_more_returns_next_chunk(self):
+        post = CommentPageTests.post
+        page = self.client.get(self.post_url(post)).context['comment_page']
+        response = self.client.get(self.more_url(post, page.next_cursor))
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertNotContains(response, '<html')
+        last = response.context['comment_page']
+        self.assertEqual([item.text for item in last],
+                         [f'Комментарий {number}' for number in range(5, 10)])
+
+        response = self.client.get(self.more_url(post, last.next_cursor))
+        self.assertEqual(len(response.context['comment_page']), 2)
+        self.assertNotContains(response, 'Показать ещё комментарии')
+
+    def test_cursor_on_post_page_without_scripts(self):
+        post = CommentPageTests.post
+        page = self.client.get(self.post_url(post)).context['comment_page']
+        response = self.client.get(
+            f'{self.post_url(post)}?comments={page.next_cursor}'
+        )
+        self.assertContains(response, 'Комментарий 5')
+        self.assertNotContains(response, 'Комментарий 4<')
+
+    def test_cached_page_skips_comment_query(self):
+        url = self.post_url(CommentPageTests.post)
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'Комментарий 4')
+
+    def test_load_more_past_the_end_is_empty(self):
+        """Курсор за последним комментарием не повторяет первую порцию."""
+        post = CommentPageTests.post
+        last = post.comments.order_by('created', 'id').last()
+        for cursor in (encode_cursor(last, NEXT, 'created'), 'garbage'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.more_url(post, cursor))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['comment_page']), 0)
+                self.assertNotContains(response, 'Комментарий')
+
+    def test_broken_cursor_is_not_cached(self):
+        url = f'{self.post_url(CommentPageTests.post)}?comments=garbage'
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, 'Комментарий 0')
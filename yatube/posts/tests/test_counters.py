@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import counters  # type: ignore
+from posts.models import AuthorStats, Follow, Post  # type: ignore
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_counter_author')
+        cls.reader = User.objects.create_user(username='test_counter_reader')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(text='Пост для счётчиков',
+                                   author=CountersTests.author)
+        comment = post.comments.create(text='Комментарий',
+                                       author=CountersTests.reader)
+        follow = Follow.objects.create(user=CountersTests.reader,
+                                       author=CountersTests.author)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 1)
+        self.assertEqual(self.stats(CountersTests.author).followers_count, 1)
+        self.assertEqual(self.stats(CountersTests.reader).following_count, 1)
+
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(self.stats(CountersTests.author).followers_count, 0)
+        self.assertEqual(self.stats(CountersTests.reader).following_count, 0)
+        post.delete()
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 0)
+
+    def test_concurrent_first_read_reuses_row(self):
+        """Строку счётчиков успел создать другой запрос."""
+        AuthorStats.objects.filter(user=CountersTests.author).delete()
+        author = User.objects.get(pk=CountersTests.author.pk)
+        with self.assertRaises(AuthorStats.DoesNotExist):
+            author.stats
+        created = AuthorStats.objects.create(user=author, posts_count=7)
+        self.assertEqual(counters.stats_for(author).pk, created.pk)
+        self.assertEqual(counters.stats_for(author).posts_count, 7)
+
+    def test_deleting_user_keeps_counters(self):
+        """Удаление пользователя с постами и подписками в обе стороны."""
+        doomed = User.objects.create_user(username='test_counter_doomed')
+        Post.objects.create(text='Пост удаляемого', author=doomed)
+        Post.objects.create(text='Пост автора', author=CountersTests.author)
+        Follow.objects.create(user=doomed, author=CountersTests.author)
+        Follow.objects.create(user=CountersTests.reader, author=doomed)
+
+        doomed.delete()
+
+        self.assertFalse(AuthorStats.objects.filter(user=doomed).exists())
+        self.assertEqual(self.stats(CountersTests.author).followers_count, 0)
+        self.assertEqual(self.stats(CountersTests.author).posts_count, 1)
+        self.assertEqual(self.stats(CountersTests.reader).following_count, 0)
+
+    def test_reconcile_counters_command(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        post = Post.objects.create(text='Пост для сверки',
+                                   author=CountersTests.author)
+        post.comments.create(text='Комментарий', author=CountersTests.reader)
+        Post.objects.update(comment_count=7)
+        AuthorStats.objects.filter(user=CountersTests.author).update(
+            posts_count=0, followers_count=3
+        )
+        AuthorStats.objects.filter(user=CountersTests.reader).delete()
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        author_stats = self.stats(CountersTests.author)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 0)
+        self.assertTrue(
+            AuthorStats.objects.filter(user=CountersTests.reader).exists()
+        )
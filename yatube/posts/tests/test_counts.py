@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (Client, override_settings, TestCase,
+                         TransactionTestCase)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import counts  # type: ignore
+from posts.models import FeedItem, Follow, Group, Post  # type: ignore
+
+User = get_user_model()
+
+
+class BoundedCountTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_count_author')
+        for number in range(30):
+            Post.objects.create(text=f'Пост {number}', author=cls.author)
+
+    def test_small_scope_is_exact(self):
+        self.assertEqual(counts.bounded_count(Post.objects.all(), 100), 30)
+        self.assertEqual(counts.bounded_count(Post.objects.all(), 30), 30)
+
+    def test_large_scope_is_estimated(self):
+        self.assertEqual(counts.bounded_count(Post.objects.all(), 10), 30)
+
+    def test_estimate_follows_gaps_in_keys(self):
+        pks = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        Post.objects.filter(pk__in=pks[:10:2]).delete()
+        estimate = counts.bounded_count(Post.objects.all(), 10)
+        self.assertGreater(estimate, 10)
+        self.assertLessEqual(estimate, 30)
+
+
+class CountServiceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_count_writer')
+        self.group = Group.objects.create(title='Группа', slug='test_count')
+        self.other = Group.objects.create(title='Другая', slug='test_other')
+        Post.objects.create(text='Первый пост', author=self.author,
+                            group=self.group)
+
+    def group_count(self, group):
+        return counts.get(('group', group.pk), group.posts.all())
+
+    def test_count_is_cached(self):
+        self.assertEqual(counts.get(('index', 0), Post.objects.all()), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(counts.get(('index', 0), Post.objects.all()), 1)
+
+    def test_new_and_deleted_posts_change_counts(self):
+        self.group_count(self.group)
+        counts.get(('index', 0), Post.objects.all())
+        post = Post.objects.create(text='Второй пост', author=self.author,
+                                   group=self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.group_count(self.group), 2)
+            self.assertEqual(counts.get(('index', 0), Post.objects.all()), 2)
+        post.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.group_count(self.group), 1)
+
+    def test_moved_post_changes_group_counts(self):
+        post = Post.objects.get()
+        self.group_count(self.group)
+        self.group_count(self.other)
+        post.group = self.other
+        post.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.group_count(self.group), 0)
+            self.assertEqual(self.group_count(self.other), 1)
+
+    def test_follow_feed_count_is_reset(self):
+        reader = User.objects.create_user(username='test_count_reader')
+        items = FeedItem.objects.filter(user=reader)
+        self.assertEqual(counts.get(('follow', reader.pk), items), 0)
+        Follow.objects.create(user=reader, author=self.author)
+        self.assertEqual(counts.get(('follow', reader.pk), items), 1)
+        Post.objects.create(text='Для подписчиков', author=self.author)
+        self.assertEqual(counts.get(('follow', reader.pk), items), 2)
+        Follow.objects.filter(user=reader).delete()
+        self.assertEqual(counts.get(('follow', reader.pk), items), 0)
+
+
+class AuthorDeletionCountTests(TransactionTestCase):
+
+    def test_follower_feeds_are_reset_once_per_author(self):
+        cache.clear()
+        author = User.objects.create_user(username='test_count_leaving')
+        reader = User.objects.create_user(username='test_count_staying')
+        Follow.objects.create(user=reader, author=author)
+        for number in range(5):
+            Post.objects.create(text=f'Пост {number}', author=author)
+        items = FeedItem.objects.filter(user=reader)
+        self.assertEqual(counts.get(('follow', reader.pk), items), 5)
+        with CaptureQueriesContext(connection) as queries:
+            author.delete()
+        follower_lookups = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT "posts_follow"."user_id"')
+        ]
+        self.assertEqual(len(follower_lookups), 1)
+        self.assertEqual(counts.get(('follow', reader.pk), items), 0)
+
+
+@override_settings(CURSOR_PAGINATION=False)
+class FeedPaginationCountTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='test_count_pages')
+        Post.objects.bulk_create(
+            [Post(text=f'Пост {number}', author=self.author)
+             for number in range(25)]
+        )
+        self.client = Client()
+
+    def test_index_uses_cached_count(self):
+        counts.get(('index', 0), Post.objects.all())
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(reverse('index'))
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT', query['sql'])
+        self.assertEqual(response.context['page'].paginator.num_pages, 3)
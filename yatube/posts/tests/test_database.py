@@ -0,0 +1,163 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from urllib.request import pathname2url
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections, OperationalError
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import (Client, override_settings, SimpleTestCase,
+                         TestCase, TransactionTestCase)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.database import ReadReplicaRouter  # type: ignore
+from posts.models import Post  # type: ignore
+
+User = get_user_model()
+
+
+class SqlitePragmaTests(TestCase):
+
+    def test_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -20000)
+
+
+class ConcurrencyTests(SimpleTestCase):
+    """Читатель не ждёт писателя, пока тот держит транзакцию."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+        writer = self.wrapper(self.path)
+        with writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+            cursor.execute('INSERT INTO item DEFAULT VALUES')
+        writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def wrapper(self, name, alias='default'):
+        return DatabaseWrapper(
+            {**connection.settings_dict, 'NAME': name}, alias
+        )
+
+    def read_while_writing(self):
+        """Читает через реплику, пока писатель держит EXCLUSIVE."""
+        writer = self.wrapper(self.path)
+        locked, done = threading.Event(), threading.Event()
+        result = {}
+
+        def read():
+            locked.wait()
+            reader = self.wrapper(
+                f'file:{pathname2url(self.path)}?mode=ro',
+                settings.REPLICA_DATABASE,
+            )
+            start = time.monotonic()
+            try:
+                with reader.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM item')
+                    result['count'] = cursor.fetchone()[0]
+            except OperationalError as error:
+                result['error'] = error
+            result['elapsed'] = time.monotonic() - start
+            reader.close()
+            done.set()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        with writer.cursor() as cursor:
+            cursor.execute('BEGIN EXCLUSIVE')
+            cursor.execute('INSERT INTO item DEFAULT VALUES')
+            locked.set()
+            done.wait(10)
+            cursor.execute('COMMIT')
+        thread.join()
+        writer.close()
+        return result
+
+    def test_reads_proceed_during_write_in_wal_mode(self):
+        result = self.read_while_writing()
+        self.assertNotIn('error', result)
+        # Незакоммиченная строка не видна, ждать её читатель не стал.
+        self.assertEqual(result['count'], 1)
+        self.assertLess(result['elapsed'], 1)
+
+    def test_reads_wait_for_writer_without_wal(self):
+        pragmas = {**settings.SQLITE_PRAGMAS, 'journal_mode': 'DELETE',
+                   'busy_timeout': 100}
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            result = self.read_while_writing()
+        self.assertIn('locked', str(result['error']))
+
+    def test_replica_is_read_only(self):
+        reader = self.wrapper(f'file:{pathname2url(self.path)}?mode=ro',
+                              settings.REPLICA_DATABASE)
+        with self.assertRaises(OperationalError):
+            with reader.cursor() as cursor:
+                cursor.execute('INSERT INTO item DEFAULT VALUES')
+        reader.close()
+
+
+@override_settings(REPLICA_READS=True)
+class ReadReplicaRouterTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='test_replica')
+        Post.objects.create(text='Пост для реплики', author=self.author)
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def queries(self, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def test_read_only_views_read_from_replica(self):
+        for url in (reverse('index'),
+                    reverse('profile', args=(self.author.username,))):
+            with self.subTest(url=url):
+                primary, replica = self.queries(url)
+                # В default остаётся только чтение сессии до представления.
+                self.assertGreater(replica, 0)
+                self.assertLess(primary, replica)
+
+    def test_other_views_read_from_primary(self):
+        primary, replica = self.queries(reverse('follow_index'))
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+    @override_settings(STREAMING_PAGES=True)
+    def test_streamed_page_reads_from_replica(self):
+        cache.clear()
+        response = self.client.get(reverse('index'))
+        self.assertTrue(response.streaming)
+        # Лента считается уже после выхода из middleware, при итерации.
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            body = b''.join(response.streaming_content)
+        response.close()
+        self.assertIn('Пост для реплики', body.decode())
+        self.assertGreater(len(replica), 0)
+        self.assertEqual(len(primary), 0)
+
+    def test_writes_go_to_primary(self):
+        router = ReadReplicaRouter()
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
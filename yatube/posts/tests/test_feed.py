@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+
+from posts import feed  # type: ignore
+from posts.models import FeedItem, Follow, Post  # type: ignore
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='test_feed_reader')
+        cls.author = User.objects.create_user(username='test_feed_author')
+
+    def feed_posts(self):
+        return list(
+            FeedItem.objects.filter(user=FeedTests.reader)
+            .values_list('post_id', flat=True)
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленту подписчика."""
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        post = Post.objects.create(text='Пост для ленты',
+                                   author=FeedTests.author)
+        self.assertEqual(self.feed_posts(), [post.id])
+
+    def test_follow_backfills_and_unfollow_cleans_feed(self):
+        """Подписка заполняет ленту старыми постами, отписка очищает."""
+        post = Post.objects.create(text='Старый пост',
+                                   author=FeedTests.author)
+        follow = Follow.objects.create(user=FeedTests.reader,
+                                       author=FeedTests.author)
+        self.assertEqual(self.feed_posts(), [post.id])
+        follow.delete()
+        self.assertEqual(self.feed_posts(), [])
+
+    @override_settings(FEED_LENGTH=3, FEED_TRIM_SLACK=0)
+    def test_feed_is_trimmed(self):
+        """В ленте хранится не больше FEED_LENGTH записей."""
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        posts = [
+            Post.objects.create(text=f'Пост № {item}',
+                                author=FeedTests.author)
+            for item in range(5)
+        ]
+        self.assertEqual(sorted(self.feed_posts()),
+                         [post.id for post in posts[-3:]])
+
+    @override_settings(FEED_LENGTH=2, FEED_TRIM_SLACK=2)
+    def test_feed_is_trimmed_past_slack(self):
+        """Лента подрезается до FEED_LENGTH, только когда перерастёт его
+        больше чем на FEED_TRIM_SLACK записей."""
+        followers = [User.objects.create_user(username=f'test_feed_fan{n}')
+                     for n in range(3)]
+        for follower in followers:
+            Follow.objects.create(user=follower, author=FeedTests.author)
+        posts = [Post.objects.create(text=f'Пост № {item}',
+                                     author=FeedTests.author)
+                 for item in range(4)]
+        for follower in followers:
+            self.assertEqual(FeedItem.objects.filter(user=follower).count(),
+                             4)
+        posts.append(Post.objects.create(text='Пятый пост',
+                                         author=FeedTests.author))
+        for follower in followers:
+            self.assertEqual(
+                sorted(FeedItem.objects.filter(user=follower)
+                       .values_list('post_id', flat=True)),
+                [post.id for post in posts[-2:]],
+            )
+
+    def test_fan_out_without_trim_costs_three_queries(self):
+        """Число запросов раскладки не зависит от числа подписчиков."""
+        for number in range(4):
+            follower = User.objects.create_user(
+                username=f'test_feed_fan{number}'
+            )
+            Follow.objects.create(user=follower, author=FeedTests.author)
+        Post.objects.bulk_create([Post(text='Пост',
+                                       author=FeedTests.author)])
+        post = Post.objects.latest('id')
+        with self.assertNumQueries(3):
+            feed.fan_out(post)
+
+    def test_rebuild_feeds_command(self):
+        """Команда rebuild_feeds восстанавливает ленты."""
+        Follow.objects.create(user=FeedTests.reader, author=FeedTests.author)
+        post = Post.objects.create(text='Пост для пересборки',
+                                   author=FeedTests.author)
+        FeedItem.objects.all().delete()
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(self.feed_posts(), [post.id])
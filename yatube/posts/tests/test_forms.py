@@ -1,11 +1,13 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, override_settings, TestCase
 from django.urls import reverse
+from PIL import Image
 
 from posts.models import Comment, Group, Post  # type: ignore
 
@@ -22,7 +24,8 @@ SMALL_GIF = (
 )
 
 
-@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR),
+                   THUMBNAIL_ASYNC=False)
 class PostCreateFormTests(TestCase):
 
     @classmethod
@@ -69,6 +72,39 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.image.name, f'posts/{name_img}')
 
+    @staticmethod
+    def get_image_file(name, ext, size):
+        file_obj = BytesIO()
+        Image.new('RGB', size=size, color=(255, 0, 0)).save(file_obj, ext)
+        return SimpleUploadedFile(name=name, content=file_obj.getvalue(),
+                                  content_type=f'image/{ext.lower()}')
+
+    @override_settings(POST_IMAGE_MAX_SIDE=20)
+    def test_create_post_downscales_large_image(self):
+        """Большая картинка уменьшается до POST_IMAGE_MAX_SIDE."""
+        form_data = {
+            'text': 'Пост с большой картинкой',
+            'image': self.get_image_file('large.jpg', 'JPEG', (50, 40)),
+        }
+        self.authorized_client.post(reverse('new_post'), data=form_data)
+        post = Post.objects.get(text=form_data['text'])
+        self.assertEqual(post.image.name, 'posts/large.jpg')
+        self.assertEqual((post.image.width, post.image.height), (20, 16))
+
+    @override_settings(POST_IMAGE_MAX_DECODE_PIXELS=100)
+    def test_create_post_rejects_too_many_pixels(self):
+        """Картинка со слишком большим числом пикселей отклоняется."""
+        posts_count = Post.objects.count()
+        form_data = {
+            'text': 'Пост с огромной картинкой',
+            'image': self.get_image_file('bomb.png', 'PNG', (50, 50)),
+        }
+        response = self.authorized_client.post(reverse('new_post'),
+                                               data=form_data)
+        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertFormError(response, 'form', 'image',
+                             'Картинка слишком большая.')
+
     def test_edit_post(self):
         """Валидная форма редактирует запись поста."""
         group2 = Group.objects.create(title='Тестирование forms 2',
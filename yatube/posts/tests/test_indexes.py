@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, IntegrityError
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post  # type: ignore
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_plan_author')
+        cls.reader = User.objects.create_user(username='test_plan_reader')
+        cls.group = Group.objects.create(title='Планы запросов',
+                                         slug='test-plans')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(text='Пост для плана запроса',
+                                       author=cls.author, group=cls.group)
+        cls.post.comments.create(text='Комментарий', author=cls.reader)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryPlanTests.reader)
+        cache.clear()
+
+    def plans(self, url, table):
+        """Планы запросов страницы, которые сортируют строки table."""
+        with CaptureQueriesContext(connection) as context:
+            self.reader_client.get(url)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if (sql.startswith('SELECT') and 'ORDER BY' in sql
+                        and f'FROM "{table}"' in sql):
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plans.append(
+                        ' | '.join(row[-1] for row in cursor.fetchall())
+                    )
+        self.assertTrue(plans, f'{url} не читает {table}')
+        return plans
+
+    def test_views_use_composite_indexes(self):
+        """Каждая лента читает посты по своему составному индексу."""
+        author = QueryPlanTests.author.username
+        cases = (
+            (reverse('index'), 'posts_post', 'post_pub_date_idx'),
+            (reverse('group_posts', args=(QueryPlanTests.group.slug,)),
+             'posts_post', 'post_group_pub_date_idx'),
+            (reverse('profile', args=(author,)),
+             'posts_post', 'post_author_pub_date_idx'),
+            (reverse('follow_index'), 'posts_post', 'feed_user_pub_date_idx'),
+            (reverse('post', args=(author, QueryPlanTests.post.pk)),
+             'posts_comment', 'comment_post_created_idx'),
+        )
+        for url, table, index in cases:
+            with self.subTest(url=url):
+                for plan in self.plans(url, table):
+                    self.assertIn(index, plan)
+                    # Досортировка равных дат (RIGHT PART) допустима,
+                    # полной сортировки всей выборки быть не должно.
+                    self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_follow_is_unique(self):
+        """База не даёт подписаться на автора дважды."""
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=QueryPlanTests.reader,
+                                  author=QueryPlanTests.author)
@@ -0,0 +1,118 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from posts import metrics  # type: ignore
+from posts.models import Follow, Group, Post  # type: ignore
+from yatube.settings import COUNT_POSTS  # type: ignore
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_budget_author')
+        cls.reader = User.objects.create_user(username='test_budget_reader')
+        cls.staff = User.objects.create_user(username='test_budget_staff',
+                                             is_staff=True)
+        cls.group = Group.objects.create(title='Бюджет запросов',
+                                         slug='test-budget')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for item in range(COUNT_POSTS + 1):
+            post = Post.objects.create(text=f'Пост под бюджет {item}',
+                                       author=cls.author, group=cls.group)
+            post.comments.create(text='Комментарий', author=cls.reader)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryBudgetTests.reader)
+        cache.clear()
+        metrics.reset()
+
+    def test_request_is_measured(self):
+        """Запрос страницы попадает в статистику своего представления."""
+        response = self.reader_client.get(reverse('index'))
+        row = metrics.report()['index']
+        self.assertEqual(row['count'], 1)
+        self.assertGreater(row['queries']['max'], 0)
+        self.assertGreater(row['template_ms']['max'], 0)
+        self.assertEqual(row['bytes']['max'], len(response.content))
+
+    @override_settings(STREAMING_PAGES=True)
+    def test_streamed_request_is_measured_after_iteration(self):
+        """Потоковый ответ записывается, когда дочитан, вместе с
+        запросами из отрисовки."""
+        response = self.reader_client.get(reverse('index'))
+        self.assertNotIn('index', metrics.report())
+        body = b''.join(response.streaming_content)
+        response.close()
+        row = metrics.report()['index']
+        self.assertEqual(row['count'], 1)
+        self.assertGreaterEqual(row['queries']['max'], 2)
+        self.assertGreater(row['template_ms']['max'], 0)
+        self.assertEqual(row['bytes']['max'], len(body))
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_pages_fit_query_budgets(self):
+        """Страницы укладываются в объявленные бюджеты запросов."""
+        author = QueryBudgetTests.author.username
+        post = Post.objects.filter(author=QueryBudgetTests.author).first()
+        for url in (
+            reverse('index'),
+            reverse('group_posts', args=(QueryBudgetTests.group.slug,)),
+            reverse('profile', args=(author,)),
+            reverse('post', args=(author, post.pk)),
+            reverse('follow_index'),
+            reverse('search') + '?q=бюджет',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.reader_client.get(url).status_code, 200)
+
+    @override_settings(QUERY_BUDGET_STRICT=True, QUERY_BUDGETS={'index': 1})
+    def test_strict_budget_fails_request(self):
+        """В строгом режиме превышение бюджета роняет запрос."""
+        with self.assertRaises(metrics.QueryBudgetExceeded):
+            self.reader_client.get(reverse('index'))
+
+    def test_stats_endpoint_is_staff_only(self):
+        """Статистику видит только персонал."""
+        self.reader_client.get(reverse('index'))
+        response = self.reader_client.get(reverse('query_stats'))
+        self.assertEqual(response.status_code, 302)
+
+        staff_client = Client()
+        staff_client.force_login(QueryBudgetTests.staff)
+        response = staff_client.get(reverse('query_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['index']['count'], 1)
+
+    def test_dump_query_stats_command(self):
+        """Команда dump_query_stats выводит собранные замеры."""
+        self.reader_client.get(reverse('index'))
+        metrics.publish()
+        out = StringIO()
+        call_command('dump_query_stats', '--json', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['index']['count'], 1)
+        out = StringIO()
+        call_command('dump_query_stats', stdout=out)
+        self.assertIn('index', out.getvalue())
+
+    def test_each_process_publishes_under_its_own_slot(self):
+        """Процессы не затирают замеры друг друга."""
+        self.reader_client.get(reverse('index'))
+        metrics.publish()
+        with mock.patch('posts.metrics.os.getpid', return_value=-1):
+            metrics.publish()
+        self.assertEqual(cache.get(metrics.PROCESSES_KEY), 2)
+        self.assertEqual(len(metrics.collect()['index']), 2)
+        metrics.reset()
+        self.assertEqual(metrics.collect(), {})
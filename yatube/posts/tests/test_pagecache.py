@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import pagecache  # type: ignore
+
+
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.renders = 0
+
+    def render(self):
+        self.renders += 1
+        return f'html {self.renders}'
+
+    def test_entry_is_reused_until_scope_is_bumped(self):
+        """Запись живёт, пока не сменится поколение её области."""
+        scope = ('group', 1)
+        self.assertEqual(pagecache.fetch(scope, [1], self.render), 'html 1')
+        self.assertEqual(pagecache.fetch(scope, [1], self.render), 'html 1')
+
+        pagecache.bump(('group', 2))
+        self.assertEqual(pagecache.fetch(scope, [1], self.render), 'html 1')
+
+        pagecache.bump(scope)
+        self.assertEqual(pagecache.fetch(scope, [1], self.render), 'html 2')
+
+        pagecache.bump(pagecache.SITE)
+        self.assertEqual(pagecache.fetch(scope, [1], self.render), 'html 3')
+        self.assertEqual(pagecache.stats(),
+                         {'hit': 2, 'miss': 3, 'stale': 0})
+
+    def test_stale_entry_is_served_while_locked(self):
+        """Пока запись пересчитывается, отдаётся устаревшая версия."""
+        scope = ('post', 1)
+        pagecache.fetch(scope, [], self.render)
+        pagecache.bump(scope)
+        cache.add(f'{pagecache._entry_key(scope, [])}:lock', 1)
+
+        self.assertEqual(pagecache.fetch(scope, [], self.render), 'html 1')
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(pagecache.stats()['stale'], 1)
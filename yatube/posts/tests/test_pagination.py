@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from posts import counts  # type: ignore
+from posts.models import Post  # type: ignore
+from posts.pagination import (ApproximatePaginator,  # type: ignore
+                              CursorPage, page_window)
+from yatube.settings import COUNT_POSTS  # type: ignore
+
+User = get_user_model()
+
+
+@override_settings(CURSOR_PAGINATION=True)
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.test_user = User.objects.create_user(username='test_cursor_user')
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый пост № {item}',
+                 author=CursorPaginationTests.test_user)
+            for item in range(COUNT_POSTS * 2 + 5)
+        ])
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def walk(self, page):
+        ids = [post.id for post in page]
+        while page.has_next():
+            response = self.guest_client.get(
+                reverse('index'), {'cursor': page.next_cursor}
+            )
+            page = response.context['page']
+            ids.extend(post.id for post in page)
+        return ids, page
+
+    def test_cursor_walk_covers_all_posts(self):
+        """Переход по курсорам выводит все посты по одному разу."""
+        response = self.guest_client.get(reverse('index'))
+        page = response.context['page']
+        self.assertIsInstance(page, CursorPage)
+        self.assertFalse(page.has_previous())
+
+        ids, last_page = self.walk(page)
+        expected = list(Post.objects.values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(last_page), 5)
+
+        response = self.guest_client.get(
+            reverse('index'), {'cursor': last_page.previous_cursor}
+        )
+        self.assertEqual([post.id for post in response.context['page']],
+                         expected[COUNT_POSTS:COUNT_POSTS * 2])
+
+    def test_page_number_links_still_work(self):
+        """Старые ссылки ?page=N продолжают работать."""
+        response = self.guest_client.get(reverse('index'), {'page': 2})
+        page = response.context['page']
+        self.assertNotIsInstance(page, CursorPage)
+        self.assertEqual(page.number, 2)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор приводит на первую страницу."""
+        response = self.guest_client.get(reverse('index'),
+                                         {'cursor': 'broken'})
+        page = response.context['page']
+        self.assertEqual(page[0], Post.objects.first())
+
+
+class PageWindowTests(TestCase):
+
+    def test_window(self):
+        cases = (
+            (1, 1, [1]),
+            (1, 5, [1, 2, 3, 4, 5]),
+            (1, 100, [1, 2, 3, None, 100]),
+            (50, 100, [1, None, 48, 49, 50, 51, 52, None, 100]),
+            (4, 100, [1, 2, 3, 4, 5, 6, None, 100]),
+            (100, 100, [1, None, 98, 99, 100]),
+        )
+        for number, num_pages, window in cases:
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), window)
+
+    def test_render_does_not_depend_on_number_of_pages(self):
+        """Миллион постов даёт такую же навигацию, как сотня."""
+        author = User.objects.create_user(username='test_window_author')
+        Post.objects.create(text='Пост для окна', author=author)
+        sizes = []
+        for count in (100, 1_000_000):
+            paginator = ApproximatePaginator(Post.objects.all(), COUNT_POSTS)
+            paginator.count = count
+            page = paginator.get_page(5)
+            html = render_to_string('includes/paginator.html',
+                                    {'page': page})
+            sizes.append(html.count('page-item'))
+        self.assertEqual(sizes[0], sizes[1])
+
+    def test_stale_count_does_not_truncate_page(self):
+        author = User.objects.create_user(username='test_stale_author')
+        for item in range(COUNT_POSTS):
+            Post.objects.create(text=f'Пост {item}', author=author)
+        paginator = ApproximatePaginator(Post.objects.all(), COUNT_POSTS)
+        paginator.count = 1
+        self.assertEqual(len(paginator.get_page(1).object_list), COUNT_POSTS)
+
+    def test_understated_count_does_not_hide_later_pages(self):
+        author = User.objects.create_user(username='test_understated_author')
+        for item in range(COUNT_POSTS * 3):
+            Post.objects.create(text=f'Пост {item}', author=author)
+        paginator = ApproximatePaginator(Post.objects.all(), COUNT_POSTS)
+        paginator.count = COUNT_POSTS * 3 // 2
+        page = paginator.get_page(2)
+        self.assertTrue(page.has_next())
+        page = paginator.get_page(3)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page.object_list), COUNT_POSTS)
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.get_page(4).number, 3)
+
+    def test_understated_count_links_to_next_page(self):
+        author = User.objects.create_user(username='test_understated_next')
+        for item in range(COUNT_POSTS * 3):
+            Post.objects.create(text=f'Пост {item}', author=author)
+        paginator = ApproximatePaginator(Post.objects.all(), COUNT_POSTS)
+        paginator.count = COUNT_POSTS
+        page = paginator.get_page(2)
+        self.assertEqual(page.number, 2)
+        self.assertTrue(page.has_next())
+
+    def test_index_serves_pages_past_cached_count(self):
+        author = User.objects.create_user(username='test_low_count_author')
+        for item in range(COUNT_POSTS * 3):
+            Post.objects.create(text=f'Пост {item}', author=author)
+        cache.clear()
+        cache.set(counts._key(('index', 0)), COUNT_POSTS * 3 // 2)
+        response = Client().get(reverse('index'), {'page': 3})
+        self.assertEqual(response.context['page'].number, 3)
+        self.assertEqual([post.text for post in response.context['page']][-1],
+                         'Пост 0')
+
+    def test_overstated_count_ends_at_last_non_empty_page(self):
+        author = User.objects.create_user(username='test_overstated_author')
+        for item in range(COUNT_POSTS + 3):
+            Post.objects.create(text=f'Пост {item}', author=author)
+        paginator = ApproximatePaginator(Post.objects.all(), COUNT_POSTS)
+        paginator.count = COUNT_POSTS * 10
+        page = paginator.get_page(7)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page.object_list), 3)
+        self.assertFalse(page.has_next())
+        self.assertEqual(paginator.num_pages, 2)
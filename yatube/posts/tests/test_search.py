@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search  # type: ignore
+from posts.models import Post  # type: ignore
+from yatube.settings import COUNT_POSTS  # type: ignore
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_search_author')
+        cls.post = Post.objects.create(
+            text='Ночная прогулка по набережной <b>Невы</b>',
+            author=cls.author,
+        )
+        Post.objects.create(text='Рецепт борща', author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def find(self, query):
+        response = self.guest_client.get(reverse('search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.context['page']
+
+    def test_search_finds_post_by_word_prefix(self):
+        """Поиск находит пост по началу слова и подсвечивает совпадение."""
+        page = self.find('набережн')
+        self.assertEqual(page.paginator.count, 1)
+        found = page.object_list[0]
+        self.assertEqual(found, SearchTests.post)
+        self.assertIn('<mark>набережной</mark>', found.snippet)
+        self.assertIn('&lt;b&gt;', found.snippet)
+
+    def test_search_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = Post.objects.create(text='Старый текст', author=self.author)
+        post.text = 'Свежий текст'
+        post.save()
+        self.assertEqual(self.find('старый').paginator.count, 0)
+        self.assertEqual(self.find('свежий').paginator.count, 1)
+        post.delete()
+        self.assertEqual(self.find('свежий').paginator.count, 0)
+
+    def test_rebuild_search_index_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        search.get_backend().remove(SearchTests.post.pk)
+        self.assertEqual(self.find('прогулка').paginator.count, 0)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.find('прогулка').paginator.count, 1)
+
+    def test_simple_backend_matches_fts(self):
+        """Запасной бэкенд ищет те же посты."""
+        results = search.SearchResults('борщ', search.SimpleSearchBackend())
+        self.assertEqual(results.count(), 1)
+        self.assertIn('<mark>борщ</mark>', results[0:10][0].snippet)
+
+    def test_pages_keep_query(self):
+        """Ссылки на страницы результатов сохраняют запрос."""
+        Post.objects.bulk_create(
+            [Post(text=f'Рецепт пирога {number}', author=SearchTests.author)
+             for number in range(COUNT_POSTS)]
+        )
+        search.get_backend().rebuild()
+        response = self.guest_client.get(reverse('search'), {'q': 'рецепт'})
+        self.assertContains(response, '?q=%D1%80%D0%B5%D1%86%D0%B5%D0%BF%D1%82'
+                                      '&amp;page=2')
+        self.assertContains(response, 'class="pagination', count=1)
+        page = self.guest_client.get(
+            reverse('search'), {'q': 'рецепт', 'page': 2}
+        ).context['page']
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page.object_list), 1)
+
+    def test_empty_query(self):
+        """Пустой запрос показывает только форму."""
+        response = self.guest_client.get(reverse('search'))
+        self.assertIsNone(response.context['page'])
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase
+
+from posts import synthetic  # type: ignore
+from posts.models import AuthorStats, Comment, Follow, Post  # type: ignore
+
+User = get_user_model()
+
+
+class SeedCommandTests(TestCase):
+
+    def seed(self, **options):
+        sizes = {'users': 20, 'groups': 3, 'posts': 100, 'comments': 150,
+                 'follows': 40, 'batch_size': 30, 'workers': 1}
+        call_command('seed', **{**sizes, **options}, stdout=StringIO())
+
+    def test_seed_adds_rows_next_to_existing_ones(self):
+        """seed не задевает имеющиеся строки и достраивает счётчики."""
+        existing = User.objects.create_user(username='test_seed_existing')
+        Post.objects.create(text='Живой пост', author=existing)
+
+        self.seed()
+
+        self.assertEqual(User.objects.count(), 21)
+        self.assertEqual(Post.objects.count(), 101)
+        self.assertEqual(Comment.objects.count(), 150)
+        self.assertFalse(Post.objects.filter(author__in=User.objects.filter(
+            username__startswith='user'
+        ), pk=1).exists())
+        self.assertEqual(AuthorStats.objects.count(), 21)
+        top = AuthorStats.objects.order_by('-posts_count').first()
+        self.assertEqual(top.posts_count,
+                         Post.objects.filter(author=top.user).count())
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')
+        ).exists())
+
+    def test_seed_with_workers_matches_plan(self):
+        """Набор из нескольких процессов совпадает с планом."""
+        self.seed(workers=2, seed=5)
+        plan = synthetic.Plan(users=20, groups=3, posts=100, comments=150,
+                              follows=40, seed=5)
+        expected = [(post.pk, post.author_id, post.group_id, post.text)
+                    for start, stop in plan.chunks('posts', 30)
+                    for post in plan.build('posts', start, stop)]
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'author_id', 'group_id', 'text'
+            )),
+            expected,
+        )
+
+    def test_seed_rejects_orphans(self):
+        """Постам без пользователей взяться неоткуда."""
+        with self.assertRaises(CommandError):
+            self.seed(users=0)
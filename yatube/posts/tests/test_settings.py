@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+SCRIPT = """
+import json
+from django.conf import settings
+print(json.dumps({
+    'debug': settings.DEBUG,
+    'toolbar': 'debug_toolbar' in settings.INSTALLED_APPS,
+    'conn_max_age': settings.DATABASES['default']['CONN_MAX_AGE'],
+    'loaders': settings.TEMPLATES[0]['OPTIONS'].get('loaders'),
+    'count_posts': settings.COUNT_POSTS,
+    'storage': settings.STATICFILES_STORAGE,
+    'static_handler': settings.STATIC_HANDLER,
+    'streaming': settings.STREAMING_PAGES,
+    'thumbnail_async': settings.THUMBNAIL_ASYNC,
+    'cache': settings.CACHES['default']['BACKEND'],
+    'page_cache_timeout': settings.PAGE_CACHE_TIMEOUT,
+}))
+"""
+
+
+class SettingsProfileTests(SimpleTestCase):
+    """Профиль выбирается окружением; настройки читаются в новом процессе."""
+
+    def load(self, **environ):
+        environ = {
+            **{key: value for key, value in os.environ.items()
+               if not key.startswith('YATUBE_')},
+            'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+            **environ,
+        }
+        output = subprocess.run(
+            [sys.executable, '-c', SCRIPT], env=environ, check=True,
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        ).stdout
+        return json.loads(output)
+
+    def test_dev_is_default(self):
+        values = self.load()
+        self.assertTrue(values['debug'])
+        self.assertTrue(values['toolbar'])
+        self.assertEqual(values['conn_max_age'], 0)
+        self.assertEqual(values['count_posts'], 10)
+        self.assertFalse(values['static_handler'])
+        self.assertFalse(values['streaming'])
+        self.assertTrue(values['thumbnail_async'])
+        # Кеш процесса не видит сбросов из других воркеров.
+        self.assertEqual(values['page_cache_timeout'], 20)
+
+    def test_prod_profile(self):
+        values = self.load(YATUBE_SETTINGS='prod', YATUBE_SECRET_KEY='key')
+        self.assertFalse(values['debug'])
+        self.assertFalse(values['toolbar'])
+        self.assertEqual(values['conn_max_age'], 600)
+        self.assertEqual(values['loaders'][0][0],
+                         'django.template.loaders.cached.Loader')
+        self.assertEqual(values['storage'],
+                         'yatube.staticfiles.CompressedManifestStorage')
+        self.assertTrue(values['static_handler'])
+        self.assertTrue(values['streaming'])
+        self.assertEqual(values['cache'], 'yatube.cache_backends.SQLiteCache')
+        self.assertEqual(values['page_cache_timeout'], 60 * 60 * 6)
+
+    def test_prod_reads_environment(self):
+        values = self.load(YATUBE_SETTINGS='prod', YATUBE_SECRET_KEY='key',
+                           YATUBE_CONN_MAX_AGE='60',
+                           YATUBE_DEBUG_TOOLBAR='1')
+        self.assertEqual(values['conn_max_age'], 60)
+        self.assertTrue(values['toolbar'])
+
+    def test_prod_with_process_cache_keeps_pages_briefly(self):
+        values = self.load(YATUBE_SETTINGS='prod', YATUBE_SECRET_KEY='key',
+                           YATUBE_CACHE='locmem')
+        self.assertEqual(values['cache'],
+                         'django.core.cache.backends.locmem.LocMemCache')
+        self.assertEqual(values['page_cache_timeout'], 20)
+
+    def test_prod_requires_secret_key(self):
+        with self.assertRaises(subprocess.CalledProcessError) as error:
+            self.load(YATUBE_SETTINGS='prod')
+        self.assertIn('YATUBE_SECRET_KEY', error.exception.stderr)
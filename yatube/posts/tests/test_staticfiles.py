@@ -0,0 +1,210 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import override_settings, SimpleTestCase
+
+from yatube.staticfiles import minify_css, StaticFiles  # type: ignore
+
+STYLE = """/* Шапка сайта */
+.header  >  a ,
+.header span {
+    color: red;
+    background: url("logo.png");
+    content: "a ; b";
+}
+""" + ".filler { margin: 0 }\n" * 40
+SCRIPT = "console.log('yatube');\n" * 40
+
+
+class MinifyCssTests(SimpleTestCase):
+
+    def test_comments_and_spaces_are_removed(self):
+        self.assertEqual(
+            minify_css('/* x */ a  >  b , c {\n  top: 0;\n}'),
+            'a>b,c{top: 0;}',
+        )
+
+    def test_strings_and_license_comments_are_kept(self):
+        css = '/*! MIT */ a { content: " ; { " }'
+        self.assertEqual(minify_css(css), '/*! MIT */ a{content: " ; { "}')
+
+
+class CollectStaticTests(SimpleTestCase):
+    """collectstatic с хешами имён, ужатым CSS и сжатыми копиями."""
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source, 'css'))
+        files = {'css/site.css': STYLE, 'css/logo.png': 'png',
+                 'site.js': SCRIPT, 'tiny.js': 'x = 1;'}
+        for name, content in files.items():
+            with open(os.path.join(self.source, name), 'w') as file:
+                file.write(content)
+        settings = override_settings(
+            STATICFILES_DIRS=[self.source], STATIC_ROOT=self.root,
+            STATICFILES_STORAGE='yatube.staticfiles.CompressedManifestStorage',
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder',
+            ],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.source, ignore_errors=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def read(self, name, mode='r'):
+        with open(os.path.join(self.root, name), mode) as file:
+            return file.read()
+
+    def test_manifest_maps_names_to_hashed_files(self):
+        paths = json.loads(self.read('staticfiles.json'))['paths']
+        self.assertRegex(paths['css/site.css'], r'^css/site\.\w{12}\.css$')
+        self.assertEqual(staticfiles_storage.url('site.js'),
+                         '/static/' + paths['site.js'])
+
+    def test_css_is_minified_with_hashed_references(self):
+        hashed = staticfiles_storage.stored_name('css/site.css')
+        css = self.read(hashed)
+        self.assertNotIn('Шапка', css)
+        self.assertIn('.header>a,.header span{', css)
+        self.assertIn('content: "a ; b"', css)
+        self.assertRegex(css, r'url\("logo\.\w{12}\.png"\)')
+
+    def test_text_files_are_precompressed(self):
+        hashed = staticfiles_storage.stored_name('site.js')
+        self.assertEqual(gzip.decompress(self.read(hashed + '.gz', 'rb')),
+                         self.read(hashed, 'rb'))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, 'tiny.js.gz')
+        ))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, 'css', 'logo.png.gz')
+        ))
+
+    def test_missing_file_keeps_its_name(self):
+        self.assertEqual(staticfiles_storage.url('missing.css'),
+                         '/static/missing.css')
+
+
+@override_settings(STATIC_MAX_AGE=60)
+class StaticFilesHandlerTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.body = SCRIPT.encode()
+        files = {'app.0123456789ab.js': cls.body,
+                 'app.0123456789ab.js.gz': gzip.compress(cls.body),
+                 'robots.txt': b'User-agent: *\n'}
+        for name, content in files.items():
+            with open(os.path.join(cls.root, name), 'wb') as file:
+                file.write(content)
+        with open(os.path.join(cls.root, 'staticfiles.json'), 'w') as file:
+            json.dump({'version': '1.0',
+                       'paths': {'app.js': 'app.0123456789ab.js'}}, file)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.handler = StaticFiles(self.django, root=self.root,
+                                   prefix='/static/')
+
+    def django(self, environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def get(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method,
+                   **{f'HTTP_{name.upper()}': value
+                      for name, value in headers.items()}}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(headers)
+
+        body = self.handler(environ, start_response)
+        response['body'] = b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+        return response
+
+    def test_hashed_file_is_immutable(self):
+        response = self.get('/static/app.0123456789ab.js')
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(response['body'], self.body)
+        self.assertIn('immutable', response['headers']['Cache-Control'])
+        self.assertRegex(response['headers']['Content-Type'],
+                         r'/javascript; charset=utf-8$')
+
+    def test_plain_file_has_short_lifetime(self):
+        response = self.get('/static/robots.txt')
+        self.assertEqual(response['headers']['Cache-Control'],
+                         'public, max-age=60')
+
+    def test_compressed_copy_is_negotiated(self):
+        response = self.get('/static/app.0123456789ab.js',
+                            accept_encoding='br, gzip')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response['body']), self.body)
+        response = self.get('/static/app.0123456789ab.js',
+                            accept_encoding='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response['headers'])
+
+    def test_if_none_match(self):
+        etag = self.get('/static/robots.txt')['headers']['ETag']
+        response = self.get('/static/robots.txt', if_none_match=etag)
+        self.assertEqual(response['status'], 304)
+        self.assertEqual(response['body'], b'')
+        response = self.get('/static/robots.txt', if_none_match='"other"')
+        self.assertEqual(response['status'], 200)
+
+    def test_range(self):
+        path = '/static/app.0123456789ab.js'
+        size = len(self.body)
+        response = self.get(path, range='bytes=8-13', accept_encoding='gzip')
+        self.assertEqual(response['status'], 206)
+        self.assertEqual(response['body'], self.body[8:14])
+        self.assertEqual(response['headers']['Content-Range'],
+                         f'bytes 8-13/{size}')
+        self.assertNotIn('Content-Encoding', response['headers'])
+        response = self.get(path, range='bytes=-5')
+        self.assertEqual(response['body'], self.body[-5:])
+        response = self.get(path, range=f'bytes={size}-')
+        self.assertEqual(response['status'], 416)
+        self.assertEqual(response['headers']['Content-Range'],
+                         f'bytes */{size}')
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.get('/static/robots.txt', range='bytes=0-3',
+                            if_range='"old"')
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(response['body'], b'User-agent: *\n')
+
+    def test_head_has_no_body(self):
+        response = self.get('/static/robots.txt', method='HEAD')
+        self.assertEqual(response['headers']['Content-Length'], '14')
+        self.assertEqual(response['body'], b'')
+
+    def test_other_paths_go_to_django(self):
+        for path in ('/', '/static/missing.js'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)['body'], b'django')
+        self.assertEqual(self.get('/static/robots.txt', 'POST')['status'],
+                         405)
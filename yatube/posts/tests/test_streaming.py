@@ -0,0 +1,136 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post  # type: ignore
+
+User = get_user_model()
+
+
+class StreamingPagesTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_stream_author')
+        cls.reader = User.objects.create_user(username='test_stream_reader')
+        cls.group = Group.objects.create(title='Поток', slug='test_stream')
+        for number in range(12):
+            Post.objects.create(text=f'Потоковый пост {number}',
+                                author=cls.author, group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(StreamingPagesTests.reader)
+        cache.clear()
+
+    def urls(self):
+        return (reverse('index'),
+                reverse('group_posts', args=(StreamingPagesTests.group.slug,)),
+                reverse('profile',
+                        args=(StreamingPagesTests.author.username,)),
+                reverse('follow_index'))
+
+    def stream(self, url, **headers):
+        with override_settings(STREAMING_PAGES=True):
+            response = self.client.get(url, **headers)
+            self.assertTrue(response.streaming)
+            chunks = list(response.streaming_content)
+        response.close()
+        return response, chunks
+
+    def test_streamed_page_matches_rendered_page(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                cache.clear()
+                rendered = self.client.get(url).content.decode()
+                cache.clear()
+                _, chunks = self.stream(url)
+                self.assertEqual(b''.join(chunks).decode(), rendered)
+
+    def test_head_is_sent_before_feed_query(self):
+        with override_settings(STREAMING_PAGES=True):
+            response = self.client.get(reverse('index'))
+            chunks = iter(response.streaming_content)
+            with CaptureQueriesContext(connection) as queries:
+                head = next(chunks).decode()
+            self.assertIn('<title>', head)
+            self.assertNotIn('Потоковый пост', head)
+            self.assertFalse(any('LIMIT' in query['sql']
+                                 for query in queries.captured_queries))
+            rest = b''.join(chunks).decode()
+        response.close()
+        self.assertIn('Потоковый пост 11', rest)
+
+    @override_settings(STREAMING_CHUNK_SIZE=1)
+    def test_cards_are_streamed_one_by_one(self):
+        _, chunks = self.stream(reverse('index'))
+        cards = [chunk for chunk in chunks if 'Потоковый пост'.encode()
+                 in chunk]
+        self.assertEqual(len(cards), 10)
+
+    def test_streamed_fragment_is_cached(self):
+        url = reverse('group_posts', args=(StreamingPagesTests.group.slug,))
+        _, first = self.stream(url)
+        with CaptureQueriesContext(connection) as queries:
+            _, second = self.stream(url)
+        self.assertEqual(b''.join(first), b''.join(second))
+        self.assertFalse(any('LIMIT 10' in query['sql']
+                             for query in queries.captured_queries))
+
+
+class CompressionTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='test_gzip_author')
+        for number in range(12):
+            Post.objects.create(text=f'Сжимаемый пост {number}',
+                                author=author)
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_page_is_gzipped(self):
+        plain = self.client.get(reverse('index'))
+        cache.clear()
+        response = self.client.get(reverse('index'),
+                                   HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('Cookie', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+
+    def test_streamed_page_is_gzipped(self):
+        plain = self.client.get(reverse('index')).content
+        cache.clear()
+        with override_settings(STREAMING_PAGES=True):
+            response = self.client.get(reverse('index'),
+                                       HTTP_ACCEPT_ENCODING='gzip')
+            body = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(body), plain)
+
+    def test_without_accept_encoding_nothing_changes(self):
+        response = self.client.get(reverse('index'),
+                                   HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_responses_are_not_compressed(self):
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            response = self.client.get(reverse('index'),
+                                       HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
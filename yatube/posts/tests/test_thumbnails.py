@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from posts import images, thumbnails  # type: ignore
+from posts.models import Post  # type: ignore
+
+User = get_user_model()
+
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR),
+                   THUMBNAIL_ASYNC=False)
+class ThumbnailsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.test_user = User.objects.create_user(username='test_thumb_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_post(self):
+        return Post.objects.create(
+            text='Пост с картинкой',
+            author=ThumbnailsTests.test_user,
+            image=SimpleUploadedFile(name='small.gif', content=SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+
+    def test_generate_stores_thumbnail_urls(self):
+        """Миниатюры строятся заранее, и карточка берёт готовый адрес."""
+        post = self.create_post()
+        self.assertEqual(post.thumbnail_urls, {})
+
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        card_url = post.thumbnail_urls['card']
+        self.assertTrue(card_url.startswith(settings.MEDIA_URL))
+
+        response = self.client.get(f'/{post.author.username}/{post.pk}/')
+        self.assertContains(response, card_url)
+
+    def test_generate_builds_responsive_variants(self):
+        """Производные картинки строятся во всех доступных форматах."""
+        post = self.create_post()
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        variants = post.thumbnail_urls['variants']
+        formats = images.supported_formats()
+        self.assertIn('WEBP', formats)
+        self.assertEqual(len(variants),
+                         len(formats) * len(settings.IMAGE_VARIANT_WIDTHS))
+        for variant in variants:
+            with self.subTest(variant=variant['name']):
+                self.assertEqual(variant['size'],
+                                 default_storage.size(variant['name']))
+
+        response = self.client.get(f'/{post.author.username}/{post.pk}/')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, f"{variants[0]['url']} 480w")
+
+        thumbnails.generate(post.pk)
+        _, files = default_storage.listdir('posts/variants')
+        stem = post.image.name[len('posts/'):-len('.gif')]
+        self.assertEqual(
+            len([name for name in files if name.startswith(f'{stem}-')]),
+            len(variants),
+        )
+
+    def test_text_post_schedules_nothing(self):
+        """Для поста без картинки миниатюры не строятся."""
+        self.client.force_login(ThumbnailsTests.test_user)
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            self.client.post(reverse('new_post'),
+                             {'text': 'Пост без картинки'})
+        self.assertTrue(Post.objects.filter(text='Пост без картинки')
+                        .exists())
+        schedule.assert_not_called()
+
+    def test_thumbnails_are_ignored_after_image_change(self):
+        """Миниатюры старой картинки не выводятся для новой."""
+        post = self.create_post()
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        post.image = 'posts/other.gif'
+        self.assertEqual(post.thumbnail_urls, {})
+
+    def test_pregenerate_thumbnails_command(self):
+        """Команда pregenerate_thumbnails строит недостающие миниатюры."""
+        post = self.create_post()
+        call_command('pregenerate_thumbnails', workers=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertIn('card', post.thumbnail_urls)
@@ -1,5 +1,7 @@
 import shutil
 import tempfile
+import time
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -8,6 +10,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, override_settings, TestCase
 from django.urls import reverse
 
+from posts import pagecache  # type: ignore
 from posts.forms import PostForm  # type: ignore
 from posts.models import Follow, Group, Post  # type: ignore
 from yatube.settings import COUNT_POSTS  # type: ignore
@@ -25,7 +28,8 @@ SMALL_GIF = (
 )
 
 
-@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR),
+                   THUMBNAIL_ASYNC=False)
 class PostsViewTests(TestCase):
 
     @classmethod
@@ -46,6 +50,7 @@ class PostsViewTests(TestCase):
                                        image=PostsViewTests.test_image)
 
     def setUp(self):
+        self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(PostsViewTests.test_user)
 
@@ -187,15 +192,44 @@ class PostsViewTests(TestCase):
         self.assertIsInstance(response_new.context['form'], PostForm)
 
     def test_cache_index_page(self):
-        """Кеширование страницы index включено"""
+        """Страница index кешируется и сбрасывается новым постом."""
+        cache.clear()
         resp_initial = self.authorized_client.get(reverse('index')).content
+        resp_cached = self.authorized_client.get(reverse('index')).content
+        self.assertEqual(resp_initial, resp_cached)
+        self.assertEqual(pagecache.stats()['hit'], 1)
+
         Post.objects.create(text='Тестовый пост проверок кеша',
                             author=PostsViewTests.test_user,)
-        resp_before = self.authorized_client.get(reverse('index')).content
-        self.assertEqual(resp_initial, resp_before)
-        cache.clear()
         resp_after = self.authorized_client.get(reverse('index')).content
         self.assertNotEqual(resp_initial, resp_after)
+        self.assertIn('Тестовый пост проверок кеша', resp_after.decode())
+
+    def test_post_card_is_cached_until_post_changes(self):
+        """Карточка поста кешируется до изменения поста."""
+        post = PostsViewTests.post
+        self.authorized_client.get(reverse('index'))
+        Post.objects.filter(pk=post.pk).update(text='Текст мимо сохранения')
+        pagecache.bump(pagecache.SITE)
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, post.text)
+
+        post.refresh_from_db()
+        post.save()
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Текст мимо сохранения')
+
+    def test_post_card_follows_author_rename(self):
+        """Переименование автора сбрасывает карточки его постов."""
+        author = User.objects.create_user(username='test_old_name')
+        Post.objects.create(text='Пост переименованного', author=author)
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            '@test_old_name')
+        author.username = 'test_new_name'
+        author.save()
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, '@test_new_name')
+        self.assertNotContains(response, '@test_old_name')
 
     def test_follow_applied(self):
         """Подписка применяетcя корректно."""
@@ -255,3 +289,158 @@ class PostsViewTests(TestCase):
         )
         obj_test_user = resp_test_user.context.get('page')
         self.assertEqual(len(obj_test_user.object_list), 0)
+
+
+class FeedQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_query_author')
+        cls.reader = User.objects.create_user(username='test_query_reader')
+        cls.group = Group.objects.create(title='Тестирование запросов',
+                                         slug='test-queries')
+        Follow.objects.create(user=FeedQueryCountTests.reader,
+                              author=FeedQueryCountTests.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(FeedQueryCountTests.reader)
+        cache.clear()
+
+    def create_posts(self, count):
+        for item in range(count):
+            post = Post.objects.create(text=f'Пост с комментариями {item}',
+                                       author=FeedQueryCountTests.author,
+                                       group=FeedQueryCountTests.group)
+            post.comments.create(text='Комментарий',
+                                 author=FeedQueryCountTests.reader)
+
+    def test_feed_pages_use_constant_number_of_queries(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+        author = FeedQueryCountTests.author.username
+        pages_queries = (
+            (reverse('index'), 4),
+            (reverse('group_posts', args=(FeedQueryCountTests.group.slug,)),
+             5),
+            (reverse('profile', args=(author,)), 5),
+            (reverse('follow_index'), 4),
+        )
+        for post_count in (1, COUNT_POSTS):
+            self.create_posts(post_count)
+            for url, queries in pages_queries:
+                with self.subTest(url=url, post_count=post_count):
+                    cache.clear()
+                    with self.assertNumQueries(queries):
+                        self.reader_client.get(url)
+
+
+class HttpCachingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_http_author')
+        cls.reader = User.objects.create_user(username='test_http_reader')
+        cls.group = Group.objects.create(title='HTTP-кеш', slug='test-http')
+        cls.post = Post.objects.create(text='Пост для HTTP-кеша',
+                                       author=cls.author, group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(HttpCachingTests.reader)
+        cache.clear()
+
+    def urls(self):
+        author = HttpCachingTests.author.username
+        return (
+            reverse('index'),
+            reverse('group_posts', args=(HttpCachingTests.group.slug,)),
+            reverse('profile', args=(author,)),
+            reverse('post', args=(author, HttpCachingTests.post.pk)),
+        )
+
+    def test_guest_pages_are_public(self):
+        """Гостю страницы отдаются публичными, с валидаторами."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_user_pages_are_private(self):
+        """Вошедшему пользователю страницы отдаются личными."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertNotIn('public', response['Cache-Control'])
+                self.assertNotEqual(
+                    response['ETag'], self.guest_client.get(url)['ETag']
+                )
+
+    def test_unchanged_page_is_not_modified(self):
+        """Неизменившаяся страница отдаётся 304 до отрисовки."""
+        url = reverse('index')
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('public', response['Cache-Control'])
+
+        Post.objects.create(text='Новый пост', author=HttpCachingTests.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_page_changes_with_comments(self):
+        """Новый комментарий меняет ETag страницы поста."""
+        url = self.urls()[-1]
+        etag = self.guest_client.get(url)['ETag']
+        self.assertEqual(
+            self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        HttpCachingTests.post.comments.create(
+            text='Комментарий', author=HttpCachingTests.reader
+        )
+        self.assertEqual(
+            self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            200,
+        )
+
+    def test_last_modified_follows_deletes(self):
+        """Удаление поста сдвигает Last-Modified ленты."""
+        url = reverse('group_posts', args=(HttpCachingTests.group.slug,))
+        Post.objects.create(text='Пост на удаление',
+                            author=HttpCachingTests.author,
+                            group=HttpCachingTests.group)
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        self.assertEqual(self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        ).status_code, 304)
+        later = time.time() + 60
+        with mock.patch('posts.pagecache.time.time', return_value=later):
+            Post.objects.filter(text='Пост на удаление').delete()
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_new_login_changes_etag(self):
+        """После нового входа страница не отдаётся 304 со старым
+        CSRF-токеном."""
+        url = self.urls()[-1]
+        etag = self.reader_client.get(url)['ETag']
+        self.assertEqual(self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code, 304)
+        self.reader_client.logout()
+        self.reader_client.force_login(HttpCachingTests.reader)
+        self.assertEqual(self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code, 200)
@@ -0,0 +1,33 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import benchmark, warmup  # type: ignore
+
+
+class TemplateWarmupTests(TestCase):
+
+    def test_only_project_templates_are_found(self):
+        names = warmup.template_names()
+        self.assertIn('posts/index.html', names)
+        self.assertIn('includes/comment_list.html', names)
+        self.assertIn('misc/404.html', names)
+        self.assertNotIn('admin/base.html', names)
+
+    def test_warmup_compiles_every_template(self):
+        timings = warmup.warmup()
+        self.assertEqual([name for name, _ in timings],
+                         warmup.template_names())
+
+    def test_command(self):
+        output = StringIO()
+        call_command('warmup_templates', stdout=output)
+        self.assertIn(f'{len(warmup.template_names())} за',
+                      output.getvalue())
+
+    def test_render_benchmark(self):
+        result = benchmark.template_render('posts/index.html', repeat=2)
+        for state in ('cold', 'warm'):
+            with self.subTest(state=state):
+                self.assertGreater(result[state]['p50_ms'], 0)
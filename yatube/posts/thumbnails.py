@@ -0,0 +1,79 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+from . import images
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix="thumbnails",
+        )
+    return _executor
+
+
+def generate(post_id):
+    """Строит миниатюры всех стандартных размеров и сохраняет их адреса."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    images.delete_variants(
+        json.loads(post.thumbnails or "{}").get("variants", [])
+    )
+    thumbnails = {}
+    if post.image:
+        thumbnails["image"] = post.image.name
+        for name, (geometry, options) in settings.THUMBNAIL_SIZES.items():
+            thumbnails[name] = get_thumbnail(
+                post.image, geometry, **options
+            ).url
+        thumbnails["variants"] = images.build_variants(post.image)
+    post.thumbnails = json.dumps(thumbnails)
+    post.save(update_fields=("thumbnails", "updated"))
+
+
+def _generate_safely(post_id):
+    try:
+        generate(post_id)
+    except Exception as error:
+        logger.exception("Не удалось построить миниатюры поста %s", post_id)
+        return error
+    return None
+
+
+def _run(post_id):
+    try:
+        return _generate_safely(post_id)
+    finally:
+        connection.close()
+
+
+def schedule(post):
+    """Ставит построение миниатюр в фон после коммита транзакции."""
+    if not settings.THUMBNAIL_ASYNC:
+        transaction.on_commit(lambda: generate(post.pk))
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, post.pk))
+
+
+def backfill(post_ids, workers):
+    """Строит миниатюры постов в workers потоков, отдаёт (id, ошибка)."""
+    post_ids = list(post_ids)
+    if workers <= 1:
+        for post_id in post_ids:
+            yield post_id, _generate_safely(post_id)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from zip(post_ids, executor.map(_run, post_ids))
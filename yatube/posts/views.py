@@ -1,34 +1,145 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 
+from . import (counters, counts, metrics, pagecache, search, streaming,
+               thumbnails)
+from .conditional import conditional, lookup, request_etag, viewer
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .models import FeedItem, Follow, Group, Post
+from .pagination import ApproximatePaginator, CursorPaginator, decode_cursor
 from yatube.settings import COUNT_POSTS  # type: ignore
 
 User = get_user_model()
 
 
-def get_paginator_page(request, objects):
-    paginator = Paginator(objects, COUNT_POSTS)
+def get_paginator_page(request, objects, count=None):
+    """Страница ленты. count - число постов или функция, которая его
+    вернёт: курсорной пагинации оно не нужно, и считать его незачем."""
+    posts = objects.for_feed()
+    cursor = request.GET.get("cursor")
+    if cursor is not None or (settings.CURSOR_PAGINATION
+                              and "page" not in request.GET):
+        return CursorPaginator(posts, COUNT_POSTS).get_page(cursor)
+
+    paginator = ApproximatePaginator(posts, COUNT_POSTS,
+                                     exact_count=objects.count)
+    if count is None:
+        # COUNT(*) по аннотированному queryset превращается в подзапрос
+        # с GROUP BY, поэтому считаем по исходному.
+        count = objects.count
+    paginator.count = count() if callable(count) else count
     page_number = request.GET.get("page")
     page = paginator.get_page(page_number)
     return page
 
 
+def get_feed_page(request, objects, count=None):
+    """get_paginator_page для лент. При потоковой отрисовке страница
+    считается, только когда до неё дойдёт шаблон, - после отправки
+    шапки."""
+    if settings.STREAMING_PAGES:
+        return SimpleLazyObject(
+            lambda: get_paginator_page(request, objects, count)
+        )
+    return get_paginator_page(request, objects, count)
+
+
+def render_feed(request, template_name, context):
+    if settings.STREAMING_PAGES:
+        return streaming.render(request, template_name, context)
+    return render(request, template_name, context)
+
+
+def comments_of(post):
+    """Комментарии поста в порядке курсора (created, id) вместе с
+    авторами: автор каждого приходит тем же запросом."""
+    return post.comments.select_related("author").order_by("created", "id")
+
+
+def get_comment_page(comments, cursor, strict=False):
+    """Порция комментариев из comments_of(post) по курсору."""
+    return CursorPaginator(comments, settings.COMMENTS_PER_PAGE,
+                           field="created", descending=False
+                           ).get_page(cursor, strict)
+
+
+def _cursor_key(cursor):
+    """Ключ кеша порции комментариев: позиция из курсора, "" без
+    курсора и None для битого курсора, который не кешируется."""
+    if not cursor:
+        return ""
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+    value, pk, direction = position
+    return f"{direction}:{value.isoformat()}:{pk}"
+
+
+def _page_validators(request, *scopes):
+    version, modified = pagecache.state(*scopes)
+    return request_etag(request, viewer(request), version), modified
+
+
+def _index_validators(request):
+    return _page_validators(request, ("index", 0))
+
+
+def _group_validators(request, slug):
+    group = lookup(request, Group.objects.all(), slug=slug)
+    return _page_validators(request, ("group", group.pk))
+
+
+def _profile_validators(request, username):
+    author = lookup(request, User.objects.select_related("stats"),
+                    username=username)
+    return _page_validators(request, ("profile", author.pk))
+
+
+def _post_validators(request, username, post_id):
+    post = lookup(request, Post.objects.select_related("author__stats",
+                                                       "group"),
+                  pk=post_id, author__username=username)
+    return _page_validators(request, ("post", post.pk),
+                            ("profile", post.author_id))
+
+
+@conditional(_index_validators, policy="index")
 def index(request):
-    posts = Post.objects.prefetch_related("author").prefetch_related("group").all()
-    page = get_paginator_page(request, posts)
-    return render(request, "posts/index.html", {"page": page})
+    posts = Post.objects.all()
+    page = get_feed_page(request, posts,
+                         count=partial(counts.get, ("index", 0), posts))
+    return render_feed(request, "posts/index.html", {"page": page})
 
 
+@conditional(_group_validators, policy="group_posts")
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = lookup(request, Group.objects.all(), slug=slug)
     posts = group.posts.all()
-    page = get_paginator_page(request, posts)
-    return render(request, "posts/group.html",
-                  {"group": group, "page": page})
+    page = get_feed_page(
+        request, posts, count=partial(counts.get, ("group", group.pk), posts)
+    )
+    return render_feed(request, "posts/group.html",
+                       {"group": group, "page": page})
+
+
+def search_posts(request):
+    query = request.GET.get("q", "").strip()
+    page = None
+    if query:
+        paginator = ApproximatePaginator(search.SearchResults(query),
+                                         COUNT_POSTS)
+        page = paginator.get_page(request.GET.get("page"))
+    return render(request, "posts/search.html",
+                  {"query": query, "page": page,
+                   "page_query": urlencode({"q": query})})
 
 
 @login_required
@@ -39,16 +150,21 @@ def new_post(request):
         n_post = form.save(commit=False)
         n_post.author = request.user
         n_post.save()
+        if n_post.image:
+            thumbnails.schedule(n_post)
         return redirect("index")
 
     return render(request, "posts/new_post.html", {"form": form,
                                                    "edit": False})
 
 
+@conditional(_profile_validators, policy="profile")
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = lookup(request, User.objects.select_related("stats"),
+                    username=username)
+    stats = counters.stats_for(author)
     posts = author.posts.all()
-    page = get_paginator_page(request, posts)
+    page = get_feed_page(request, posts, count=stats.posts_count)
 
     following = False
     if request.user.is_authenticated:
@@ -56,7 +172,7 @@ def profile(request, username):
             user=request.user, author=author
         ).exists()
 
-    return render(
+    return render_feed(
         request, "posts/profile.html",
         {
             "page": page,
@@ -66,9 +182,14 @@ def profile(request, username):
     )
 
 
+@conditional(_post_validators, policy="post")
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
-    comments = post.comments.all()
+    post = lookup(request, Post.objects.select_related("author__stats",
+                                                       "group"),
+                  pk=post_id, author__username=username)
+    counters.stats_for(post.author)
+    comments = comments_of(post)
+    cursor = request.GET.get("comments")
     form = CommentForm()
     return render(
         request, "posts/post.html",
@@ -76,11 +197,34 @@ def post_view(request, username, post_id):
             "author": post.author,
             "post": post,
             "comments": comments,
+            # Порция считается, только если комментариев нет в кеше.
+            "comment_page": SimpleLazyObject(
+                lambda: get_comment_page(comments, cursor)
+            ),
+            "comment_cursor": _cursor_key(cursor),
             "form": form
         }
     )
 
 
+@conditional(_post_validators, policy="post")
+def post_comments(request, username, post_id):
+    """Следующая порция комментариев для кнопки «Показать ещё»."""
+    post = lookup(request, Post.objects.select_related("author__stats",
+                                                       "group"),
+                  pk=post_id, author__username=username)
+    return render(
+        request, "includes/comment_list.html",
+        {
+            "post": post,
+            # Курсор за концом не повторяет первую порцию.
+            "comment_page": get_comment_page(comments_of(post),
+                                             request.GET.get("cursor"),
+                                             strict=True),
+        }
+    )
+
+
 @login_required
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id, author__username=username)
@@ -91,6 +235,8 @@ def post_edit(request, username, post_id):
                     instance=post)
     if form.is_valid():
         form.save()
+        if "image" in form.changed_data:
+            thumbnails.schedule(post)
         return redirect("post", username, post_id)
 
     return render(
@@ -103,6 +249,12 @@ def post_edit(request, username, post_id):
     )
 
 
+@staff_member_required
+def query_stats(request):
+    return JsonResponse(metrics.report(),
+                        json_dumps_params={"ensure_ascii": False})
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -133,10 +285,15 @@ def add_comment(request, username, post_id):
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(
-        author__following__user=request.user
+        feed_items__user=request.user
+    ).order_by("-feed_items__pub_date", "-id")
+    # Считаем строки самой ленты, без соединения с постами.
+    items = FeedItem.objects.filter(user=request.user)
+    page = get_feed_page(
+        request, posts,
+        count=partial(counts.get, ("follow", request.user.pk), items),
     )
-    page = get_paginator_page(request, posts)
-    return render(request, "posts/follow.html", {"page": page})
+    return render_feed(request, "posts/follow.html", {"page": page})
 
 
 @login_required
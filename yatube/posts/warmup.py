@@ -0,0 +1,54 @@
+"""Прогрев шаблонов: компиляция всех шаблонов проекта при старте воркера.
+
+С кеширующим загрузчиком (профиль prod) шаблон разбирается один раз на
+процесс. Без прогрева эту цену платит первый запрос к каждому шаблону в
+каждом воркере; warmup() платит её заранее, из wsgi.py при
+TEMPLATE_WARMUP или командой warmup_templates.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+
+def template_dirs():
+    """Каталоги шаблонов проекта: DIRS и templates/ приложений проекта,
+    без шаблонов сторонних пакетов вроде админки."""
+    dirs = []
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            dirs.extend(engine.engine.dirs)
+    dirs.extend(get_app_template_dirs("templates"))
+    root = os.path.join(os.path.abspath(settings.BASE_DIR), "")
+    return [directory for directory in dict.fromkeys(map(str, dirs))
+            if os.path.abspath(directory).startswith(root)]
+
+
+def template_names():
+    names = set()
+    for directory in template_dirs():
+        for path, _, files in os.walk(directory):
+            for name in files:
+                relative = os.path.relpath(os.path.join(path, name),
+                                           directory)
+                names.add(relative.replace(os.sep, "/"))
+    return sorted(names)
+
+
+def warmup():
+    """Компилирует шаблоны проекта, отдаёт [(имя, мс)].
+
+    Синтаксическая ошибка в шаблоне не глотается: лучше узнать о ней при
+    старте воркера, чем на запросе.
+    """
+    timings = []
+    for name in template_names():
+        start = time.perf_counter()
+        for engine in engines.all():
+            if isinstance(engine, DjangoTemplates):
+                engine.get_template(name)
+        timings.append((name, (time.perf_counter() - start) * 1000))
+    return timings
@@ -0,0 +1,411 @@
+"""Бэкенды кеша, общие для всех процессов одной машины.
+
+SQLiteCache хранит записи в отдельном файле SQLite в режиме WAL: его
+видят все воркеры, а incr атомарен между процессами. TwoTierCache
+ставит перед общим кешем маленький LRU в памяти процесса. Ключи
+разложены по корзинам, у каждой корзины свой общий ключ версии: когда
+процесс меняет запись, попадающую в локальный уровень, он увеличивает
+версию её корзины, и остальные процессы, заметив новую версию,
+сбрасывают только копии из этой корзины.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+)
+"""
+# Просроченные записи чистятся после каждого CULL_EVERY-го set.
+CULL_EVERY = 100
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite; LOCATION - путь к файлу."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+        self._sets = 0
+
+    def _connection(self):
+        # Соединение своё у каждого потока и у каждого процесса после
+        # fork: делить одно соединение SQLite между ними нельзя.
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30,
+                                         isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _write(self, statements):
+        """Выполняет изменения одной транзакцией с блокировкой записи."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        if not names:
+            return {}
+        rows = self._connection().execute(
+            "SELECT key, value FROM cache_entries WHERE key IN (%s) "
+            "AND (expires IS NULL OR expires > ?)"
+            % ", ".join("?" * len(names)),
+            (*names, time.time()),
+        ).fetchall()
+        return {names[name]: pickle.loads(value) for name, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self._key(key, version),
+             pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires)
+            for key, value in data.items()
+        ]
+        self._write(lambda connection: connection.executemany(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires) "
+            "VALUES (?, ?, ?)", rows,
+        ))
+        self._sets += 1
+        if self._sets % CULL_EVERY == 0:
+            self._cull()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        name = self._key(key, version)
+        row = (name, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+               self.get_backend_timeout(timeout))
+
+        def statements(connection):
+            connection.execute(
+                "DELETE FROM cache_entries WHERE key = ? AND expires <= ?",
+                (name, time.time()),
+            )
+            return connection.execute(
+                "INSERT OR IGNORE INTO cache_entries (key, value, expires) "
+                "VALUES (?, ?, ?)", row,
+            ).rowcount == 1
+
+        return self._write(statements)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        name = self._key(key, version)
+        return self._write(lambda connection: connection.execute(
+            "UPDATE cache_entries SET expires = ? WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (self.get_backend_timeout(timeout), name, time.time()),
+        ).rowcount == 1)
+
+    def incr(self, key, delta=1, version=None):
+        name = self._key(key, version)
+
+        def statements(connection):
+            row = connection.execute(
+                "SELECT value FROM cache_entries WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)", (name, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                "UPDATE cache_entries SET value = ? WHERE key = ?",
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), name),
+            )
+            return value
+
+        return self._write(statements)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        names = [(self._key(key, version),) for key in keys]
+        self._write(lambda connection: connection.executemany(
+            "DELETE FROM cache_entries WHERE key = ?", names,
+        ))
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        self._write(lambda connection: connection.execute(
+            "DELETE FROM cache_entries"
+        ))
+
+    def _cull(self):
+        def statements(connection):
+            connection.execute(
+                "DELETE FROM cache_entries WHERE expires <= ?", (time.time(),)
+            )
+            total, = connection.execute(
+                "SELECT COUNT(*) FROM cache_entries"
+            ).fetchone()
+            if total > self._max_entries:
+                # Первыми уходят записи, которым скоро истекать.
+                connection.execute(
+                    "DELETE FROM cache_entries WHERE key IN ("
+                    "SELECT key FROM cache_entries "
+                    "ORDER BY expires IS NULL, expires LIMIT ?)",
+                    (total // self._cull_frequency,),
+                )
+
+        self._write(statements)
+
+
+class _LocalTier:
+    """LRU процесса; общий для всех потоков, как хранилище LocMemCache."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.versions = {}
+        self.checked = 0.0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value, _ = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, timeout, bucket):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, value, bucket)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def _drop(self, buckets):
+        stale = [key for key, (_, _, bucket) in self.entries.items()
+                 if bucket in buckets]
+        for key in stale:
+            del self.entries[key]
+
+    def sync(self, versions):
+        """Сбрасывает копии корзин, чьи версии изменились, и отдаёт
+        номера этих корзин."""
+        with self.lock:
+            changed = {bucket for bucket, version in versions.items()
+                       if self.versions.get(bucket) != version}
+            if changed:
+                self._drop(changed)
+                self.versions.update(versions)
+            self.checked = time.monotonic()
+            return changed
+
+    def bumped(self, bucket, version):
+        """Версию корзины поднял этот процесс. Свой LRU уже поправлен;
+        сбрасывать корзину нужно, только если её успел поднять кто-то
+        ещё."""
+        with self.lock:
+            if self.versions.get(bucket) != version - 1:
+                self._drop({bucket})
+            self.versions[bucket] = version
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    """LRU процесса перед общим кешем.
+
+    OPTIONS: SHARED - алиас общего кеша в CACHES, MAX_ENTRIES - размер
+    LRU, LOCAL_TIMEOUT - сколько секунд копия живёт в процессе,
+    LOCAL_KEYS - префиксы ключей, которые копируются в процесс (None -
+    все), CHECK_INTERVAL - как часто сверять версии, когда ответ
+    целиком взят из LRU (0 - при каждом чтении), BUCKETS - на сколько
+    корзин делятся ключи.
+
+    Остальные ключи (поколения, счётчики, блокировки) всегда читаются
+    из общего кеша. Запись, удаление и incr локального ключа
+    увеличивают версию его корзины, и другие процессы сбрасывают из
+    своего LRU только эту корзину.
+    """
+    VERSION_KEY = "twotier:version"
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED", "shared")
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        self.check_interval = options.get("CHECK_INTERVAL", 1)
+        self.buckets = options.get("BUCKETS", 64)
+        self.version_keys = [f"{self.VERSION_KEY}:{bucket}"
+                             for bucket in range(self.buckets)]
+        prefixes = options.get("LOCAL_KEYS")
+        self.local_keys = tuple(prefixes) if prefixes is not None else None
+        with _tiers_lock:
+            self._tier = _tiers.setdefault(
+                location, _LocalTier(self._max_entries)
+            )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _is_local(self, key):
+        return self.local_keys is None or str(key).startswith(
+            self.local_keys
+        )
+
+    def _bucket(self, key):
+        return zlib.crc32(str(key).encode()) % self.buckets
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _bump(self, buckets):
+        shared = self.shared
+        for bucket in buckets:
+            name = self.version_keys[bucket]
+            try:
+                current = shared.incr(name)
+            except ValueError:
+                # Как и поколения кеша страниц, версия начинается со
+                # времени: после clear() она не совпадёт ни с одной
+                # прежней.
+                shared.add(name, time.time_ns(), None)
+                current = shared.incr(name)
+            self._tier.bumped(bucket, current)
+
+    def _remember(self, key, version, value, timeout):
+        self._tier.set((key, version), value, timeout, self._bucket(key))
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        tier = self._tier
+        found, missing = {}, []
+        for key in keys:
+            hit, value = (tier.get((key, version)) if self._is_local(key)
+                          else (False, None))
+            if hit:
+                found[key] = value
+            else:
+                missing.append(key)
+        check = time.monotonic() - tier.checked >= self.check_interval
+        if not missing and not check:
+            return found
+        # Версии читаются тем же обращением и раньше значений: если
+        # запись поменяют между чтениями, версия уже будет новой для
+        # следующего чтения.
+        if version is None:
+            values = self.shared.get_many(self.version_keys + missing)
+        else:
+            values = self.shared.get_many(self.version_keys)
+            values.update(self.shared.get_many(missing, version=version))
+        changed = tier.sync({
+            bucket: values.pop(name, None)
+            for bucket, name in enumerate(self.version_keys)
+        })
+        if changed & {self._bucket(key) for key in found}:
+            # Найденные в LRU копии могли устареть: читаем заново.
+            return self.get_many(keys, version=version)
+        for key, value in values.items():
+            if self._is_local(key):
+                self._remember(key, version, value, self.local_timeout)
+        found.update(values)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        local = [key for key in data if self._is_local(key)]
+        if local:
+            self._tier.discard([(key, version) for key in local])
+            self._bump({self._bucket(key) for key in local})
+            for key in local:
+                self._remember(key, version, data[key],
+                               self._local_timeout(timeout))
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and self._is_local(key):
+            self._bump({self._bucket(key)})
+            self._remember(key, version, value, self._local_timeout(timeout))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        if self._is_local(key):
+            self._tier.discard([(key, version)])
+            self._bump({self._bucket(key)})
+        return value
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        local = [key for key in keys if self._is_local(key)]
+        if local:
+            self._tier.discard([(key, version) for key in local])
+            self._bump({self._bucket(key) for key in local})
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        self.shared.clear()
+        self._bump(range(self.buckets))
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
@@ -0,0 +1,11 @@
+"""Settings profile chosen by YATUBE_SETTINGS: dev (default) or prod.
+
+DJANGO_SETTINGS_MODULE may also point at yatube.settings.dev or
+yatube.settings.prod directly.
+"""
+import os
+
+if os.environ.get('YATUBE_SETTINGS', 'dev') == 'prod':
+    from .prod import *
+else:
+    from .dev import *
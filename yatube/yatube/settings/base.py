@@ -0,0 +1,369 @@
+"""
+Django settings for yatube project, shared by the dev and prod profiles.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+Values that differ between machines are read from YATUBE_* environment
+variables.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+from urllib.request import pathname2url
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+COUNT_POSTS = 10
+
+# Comments per chunk on the post page and the "load more" endpoint
+COMMENTS_PER_PAGE = 50
+
+# Page links: first/last ON_ENDS pages and ON_EACH_SIDE around the current
+# one
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+
+# Feed post counts for page links: kept in the cache for COUNTS_TIMEOUT
+# seconds and updated by signals; rows past COUNTS_EXACT_LIMIT are estimated.
+# A post saved while a count is being taken can be missed, so the count
+# is retaken every few minutes
+COUNTS_TIMEOUT = 5 * 60
+COUNTS_EXACT_LIMIT = 10000
+
+# Feed pages can be streamed: the page head goes out before the feed
+# query, then post cards in chunks of at least STREAMING_CHUNK_SIZE chars
+STREAMING_PAGES = env_bool('YATUBE_STREAMING_PAGES', False)
+STREAMING_CHUNK_SIZE = 4096
+
+# On-the-fly response compression (brotli when installed, else gzip);
+# levels are tuned for per-request compression, not for the best ratio
+COMPRESSION_MIN_SIZE = 200
+COMPRESSION_GZIP_LEVEL = 5
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Keyset pagination for feeds; ?page=N links keep using Paginator
+CURSOR_PAGINATION = False
+
+# JSON API: max items per page for ?limit=
+API_MAX_LIMIT = 100
+
+# Follow feed: max items kept per user and insert batch size. A feed is
+# trimmed back to FEED_LENGTH only once it outgrows it by FEED_TRIM_SLACK,
+# so most new posts skip the trim
+FEED_LENGTH = 1000
+FEED_TRIM_SLACK = 100
+FEED_BATCH_SIZE = 500
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get(
+    'YATUBE_SECRET_KEY', '-z+eu&(1msgb1$s8$_kkz2!9+%4&w*)4o43x4#bv0xo%+7+v#8'
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = env_bool('YATUBE_DEBUG')
+
+ALLOWED_HOSTS = env_list('YATUBE_ALLOWED_HOSTS', [
+    "localhost",
+    "127.0.0.1",
+    "[::1]",
+    "testserver",
+])
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'posts.compression.CompressionMiddleware',
+    'posts.metrics.QueryBudgetMiddleware',
+    'posts.database.ReadOnlyViewMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# Per-view query, SQL time, template time and size percentiles
+METRICS_ENABLED = True
+METRICS_WINDOW = 1000
+METRICS_PUBLISH_INTERVAL = 30
+
+# Max queries per URL name; over budget is logged, or raised when strict
+QUERY_BUDGETS = {
+    'index': 6,
+    'group_posts': 7,
+    'profile': 7,
+    'post': 6,
+    'post_comments': 4,
+    'follow_index': 5,
+    'search': 6,
+}
+QUERY_BUDGET_STRICT = False
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'posts.metrics.TimedDjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'yatube.context_processors.get_year',
+            ],
+        },
+    },
+]
+
+# Compile all project templates when a WSGI worker boots
+TEMPLATE_WARMUP = env_bool('YATUBE_TEMPLATE_WARMUP')
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('YATUBE_DB_NAME',
+                               os.path.join(BASE_DIR, 'db.sqlite3')),
+        # Seconds a connection is reused across requests, 0 - per request
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 0)),
+    }
+}
+
+# Read-only connection to the same file; READ_ONLY_VIEWS read through it
+# when REPLICA_READS is on. WAL lets it read while another worker writes
+REPLICA_DATABASE = 'replica'
+DATABASES[REPLICA_DATABASE] = {
+    **DATABASES['default'],
+    'NAME': 'file:%s?mode=ro' % pathname2url(DATABASES['default']['NAME']),
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['posts.database.ReadReplicaRouter']
+READ_ONLY_VIEWS = ('index', 'group_posts', 'profile', 'post',
+                   'post_comments')
+REPLICA_READS = env_bool('YATUBE_REPLICA_READS')
+
+# Applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+# In-process WSGI handler for STATIC_ROOT (see yatube/staticfiles.py).
+# Hashed files are cached forever, the rest for STATIC_MAX_AGE seconds;
+# collectstatic precompresses text files of at least COMPRESS_MIN_SIZE bytes
+STATIC_HANDLER = env_bool('YATUBE_STATIC_HANDLER', False)
+STATIC_MAX_AGE = 60
+STATIC_COMPRESS_MIN_SIZE = 256
+
+# Login
+LOGIN_URL = '/auth/login/'
+LOGIN_REDIRECT_URL = 'index'
+
+# Media
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Uploads are streamed to temporary files in chunks, never kept in memory
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Post image limits: checked from the header, larger images are downscaled
+POST_IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 100_000_000
+POST_IMAGE_MAX_DECODE_PIXELS = 25_000_000
+POST_IMAGE_MAX_SIDE = 2048
+POST_IMAGE_QUALITY = 85
+
+# Thumbnails pre-generated in background threads after upload
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+
+# Responsive derivatives of post images, most preferred format first
+IMAGE_VARIANT_WIDTHS = (480, 720, 960)
+IMAGE_VARIANT_RATIO = 960 / 339
+IMAGE_VARIANT_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+IMAGE_VARIANT_QUALITY = 80
+
+# Send e-mail
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Cache: YATUBE_CACHE=locmem (per process), file or sqlite (shared by
+# all local workers, stored in YATUBE_CACHE_LOCATION).
+# YATUBE_CACHE_LOCAL_ENTRIES > 0 puts a per-process LRU in front of it
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE', 'locmem')
+CACHE_LOCATION = os.environ.get('YATUBE_CACHE_LOCATION',
+                                os.path.join(BASE_DIR, 'cache'))
+CACHE_LOCAL_ENTRIES = int(os.environ.get('YATUBE_CACHE_LOCAL_ENTRIES', 0))
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'sqlite': {
+        'BACKEND': 'yatube.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_LOCATION, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Backends every local worker sees; with locmem a pagecache bump reaches
+# only the worker that made the write
+SHARED_CACHE_BACKENDS = ('file', 'sqlite')
+
+
+def cache_settings(backend, local_entries=0):
+    """CACHES for a CACHE_BACKENDS name, with a per-process LRU in front
+    of it when local_entries > 0."""
+    if not local_entries:
+        return {'default': CACHE_BACKENDS[backend]}
+    return {
+        'default': {
+            'BACKEND': 'yatube.cache_backends.TwoTierCache',
+            'LOCATION': 'local',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'MAX_ENTRIES': local_entries,
+                'LOCAL_TIMEOUT': 5,
+                # Only rendered fragments: generations, counters and locks
+                # must always be read from the shared tier
+                'LOCAL_KEYS': ['pagecache:page:', 'template.cache.'],
+                # A fragment served from the local tier may be up to a
+                # second stale; pagecache generations are still exact
+                'CHECK_INTERVAL': 1,
+            },
+        },
+        'shared': CACHE_BACKENDS[backend],
+    }
+
+
+def page_cache_timeout(backend):
+    """Page cache entries are invalidated by signals, so in a shared cache
+    they may live long. A per-process cache misses other workers' bumps:
+    there they live no longer than the old fixed index cache did."""
+    return 60 * 60 * 6 if backend in SHARED_CACHE_BACKENDS else 20
+
+
+# Enable cache
+CACHES = cache_settings(CACHE_BACKEND, CACHE_LOCAL_ENTRIES)
+
+# Full-text search over posts: SqliteFTSBackend or SimpleSearchBackend
+SEARCH_BACKEND = 'posts.search.SqliteFTSBackend'
+
+# HTTP caching of HTML pages for guests (seconds); logged-in users get
+# private responses that are revalidated with ETag on every request
+HTML_CACHE_POLICIES = {
+    'index': {'max_age': 30, 's_maxage': 60},
+    'group_posts': {'max_age': 30, 's_maxage': 60},
+    'profile': {'max_age': 30, 's_maxage': 60},
+    'post': {'max_age': 60, 's_maxage': 300},
+}
+
+# Page cache
+PAGE_CACHE_TIMEOUT = page_cache_timeout(CACHE_BACKEND)
+PAGE_CACHE_LOCK_TIMEOUT = 10
@@ -0,0 +1,16 @@
+"""Development profile: debug pages and the debug toolbar."""
+from .base import *
+
+DEBUG = env_bool('YATUBE_DEBUG', True)
+
+INSTALLED_APPS = INSTALLED_APPS + [
+    "debug_toolbar",
+]
+
+MIDDLEWARE = MIDDLEWARE + [
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+]
+
+INTERNAL_IPS = [
+    "127.0.0.1",
+]
@@ -0,0 +1,60 @@
+"""Production profile.
+
+The secret key must come from YATUBE_SECRET_KEY. Database connections
+are kept between requests, read-only pages read through the replica
+connection and all templates are compiled once, at worker boot. Static
+The cache defaults to the sqlite backend shared by all local workers,
+so that page cache invalidation reaches every worker. Static
+files get content hashes and precompressed copies at collectstatic time
+and are served by the worker itself, feed pages are streamed. The debug
+toolbar is installed only with YATUBE_DEBUG_TOOLBAR=1.
+"""
+import os
+from copy import deepcopy
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *
+
+try:
+    SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Set YATUBE_SECRET_KEY for the prod profile')
+
+# Copies, so that importing this module leaves base untouched
+DATABASES = deepcopy(DATABASES)
+TEMPLATES = deepcopy(TEMPLATES)
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(
+        os.environ.get('YATUBE_CONN_MAX_AGE', 600)
+    )
+
+REPLICA_READS = env_bool('YATUBE_REPLICA_READS', True)
+
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE', 'sqlite')
+CACHES = cache_settings(CACHE_BACKEND, CACHE_LOCAL_ENTRIES)
+PAGE_CACHE_TIMEOUT = page_cache_timeout(CACHE_BACKEND)
+
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATE_WARMUP = env_bool('YATUBE_TEMPLATE_WARMUP', True)
+
+STREAMING_PAGES = env_bool('YATUBE_STREAMING_PAGES', True)
+
+STATICFILES_STORAGE = 'yatube.staticfiles.CompressedManifestStorage'
+STATIC_HANDLER = env_bool('YATUBE_STATIC_HANDLER', True)
+
+if env_bool('YATUBE_DEBUG_TOOLBAR'):
+    INSTALLED_APPS = INSTALLED_APPS + [
+        "debug_toolbar",
+    ]
+    MIDDLEWARE = MIDDLEWARE + [
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    ]
+    INTERNAL_IPS = env_list('YATUBE_INTERNAL_IPS', ["127.0.0.1"])
@@ -0,0 +1,8 @@
+"""Test profile for pytest: the dev profile with thumbnails built inline.
+
+A background thumbnail thread would outlive a test's MEDIA_ROOT override
+and write into the real media directory.
+"""
+from .dev import *
+
+THUMBNAIL_ASYNC = False
@@ -0,0 +1,287 @@
+"""Статика: имена с хешем содержимого, сжатие при сборке и раздача из
+процесса.
+
+CompressedManifestStorage при collectstatic добавляет в имена файлов
+хеш содержимого, ужимает CSS и кладёт рядом с текстовыми файлами
+копии .gz и, если установлен пакет brotli, .br. StaticFiles - обёртка
+WSGI-приложения, которая отдаёт STATIC_ROOT сама: файлы с хешем в имени
+кешируются навсегда (immutable), поддерживаются If-None-Match, Range и
+выбор сжатой копии по Accept-Encoding.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".json", ".map", ".svg", ".txt", ".xml",
+                ".html", ".ico", ".eot", ".otf", ".ttf")
+# Расширение сжатой копии по Content-Encoding, в порядке предпочтения.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+BLOCK_SIZE = 64 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_CSS_TOKENS = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""  # строки не трогаем
+    r"|(/\*(?!!).*?\*/)"                          # комментарии, кроме /*!
+    r"|(\s+)",
+    re.S,
+)
+# Пробелы вокруг этих символов не нужны.
+_CSS_TIGHT = tuple("{};,>")
+
+
+def minify_css(text):
+    """Убирает из CSS комментарии и лишние пробелы, строки не меняет."""
+    result, position = [], 0
+    for match in _CSS_TOKENS.finditer(text):
+        result.append(text[position:match.start()])
+        position = match.end()
+        literal, comment, space = match.groups()
+        if literal:
+            result.append(literal)
+        elif space and not (text[match.start() - 1:match.start()]
+                            in _CSS_TIGHT
+                            or text[match.end():match.end() + 1]
+                            in _CSS_TIGHT):
+            result.append(" ")
+    result.append(text[position:])
+    return "".join(result).strip()
+
+
+def compress(data):
+    """Сжатые копии data: {расширение: байты}, только если они меньше."""
+    copies = {".gz": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        copies[".br"] = brotli.compress(data, quality=11)
+    return {suffix: copy for suffix, copy in copies.items()
+            if len(copy) < len(data)}
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который ещё ужимает и сжимает файлы.
+
+    Без манифеста (до первого collectstatic) ссылка ведёт на исходное
+    имя файла, а не роняет страницу.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in paths:
+            hashed_name = self.hashed_files.get(
+                self.hash_key(self.clean_name(name))
+            )
+            for target in {name, hashed_name} - {None}:
+                self._optimize(target)
+
+    def _optimize(self, name):
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as source:
+            data = source.read()
+        if name.endswith(".css") and not name.endswith(".min.css"):
+            minified = minify_css(data.decode(settings.FILE_CHARSET))
+            data = minified.encode(settings.FILE_CHARSET)
+            self.delete(name)
+            self._save(name, ContentFile(data))
+        if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return
+        for suffix, copy in compress(data).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(copy))
+
+
+def _etag(stat, tag=""):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{tag}"'
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip().replace(" ", "")
+        if quality in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _byte_range(header, size):
+    """(начало, конец) из Range или None, если заголовок не разобрать
+    или диапазонов несколько; ValueError - диапазон вне файла."""
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    if not (first.isdigit() or last.isdigit()):
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            raise ValueError(header)
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last.isdigit() else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            block = file.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+class StaticFile:
+    """Файл из STATIC_ROOT со сжатыми копиями и готовыми заголовками."""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.etag = _etag(stat)
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/") or content_type.endswith(
+                ("javascript", "json", "xml")):
+            content_type += "; charset=utf-8"
+        self.headers = [
+            ("Content-Type", content_type),
+            ("Cache-Control",
+             IMMUTABLE if immutable
+             else f"public, max-age={settings.STATIC_MAX_AGE}"),
+        ]
+        self.encoded = {}
+        for coding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                stat = os.stat(path + suffix)
+                self.encoded[coding] = (path + suffix, stat.st_size,
+                                        _etag(stat, "-" + coding))
+        if self.encoded:
+            self.headers.append(("Vary", "Accept-Encoding"))
+
+    def _variant(self, environ):
+        if self.encoded and "HTTP_RANGE" not in environ:
+            accepted = accepted_encodings(
+                environ.get("HTTP_ACCEPT_ENCODING", "")
+            )
+            for coding, _ in ENCODINGS:
+                if coding in self.encoded and coding in accepted:
+                    return (coding, *self.encoded[coding])
+        return None, self.path, self.size, self.etag
+
+    def respond(self, environ, start_response):
+        coding, path, size, etag = self._variant(environ)
+        headers = [*self.headers, ("ETag", etag)]
+        if coding is not None:
+            headers.append(("Content-Encoding", coding))
+
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+        if if_none_match is not None:
+            tags = {tag.strip().lstrip("W/")
+                    for tag in if_none_match.split(",")}
+            if "*" in tags or etag in tags:
+                start_response("304 Not Modified", headers)
+                return []
+
+        headers.append(("Accept-Ranges", "bytes"))
+        status, start, length = "200 OK", 0, size
+        if coding is None and "HTTP_RANGE" in environ and (
+                environ.get("HTTP_IF_RANGE", etag) == etag):
+            try:
+                byte_range = _byte_range(environ["HTTP_RANGE"], size)
+            except ValueError:
+                start_response("416 Range Not Satisfiable",
+                               [*headers, ("Content-Range", f"bytes */{size}"),
+                                ("Content-Length", "0")])
+                return []
+            if byte_range is not None:
+                start, end = byte_range
+                status, length = "206 Partial Content", end - start + 1
+                headers.append(("Content-Range",
+                                f"bytes {start}-{end}/{size}"))
+        headers.append(("Content-Length", str(length)))
+        start_response(status, headers)
+
+        if environ["REQUEST_METHOD"] == "HEAD":
+            return []
+        if length == size:
+            file_wrapper = environ.get("wsgi.file_wrapper", FileWrapper)
+            return file_wrapper(open(path, "rb"), BLOCK_SIZE)
+        return _read(path, start, length)
+
+
+class StaticFiles:
+    """WSGI-обёртка, которая отдаёт STATIC_ROOT без Django.
+
+    Список файлов читается один раз при старте воркера, поэтому после
+    collectstatic воркеры нужно перезапустить. Неизвестные пути уходят
+    в обёрнутое приложение.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = self._scan()
+
+    def _hashed_names(self):
+        storage = CompressedManifestStorage(location=self.root)
+        return set(storage.load_manifest().values())
+
+    def _scan(self):
+        files = {}
+        if not self.root or not os.path.isdir(self.root):
+            return files
+        hashed_names = self._hashed_names()
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                # Сжатые копии отдаются вместе с исходным файлом.
+                if name.endswith(suffixes) and os.path.isfile(
+                        os.path.splitext(path)[0]):
+                    continue
+                url = os.path.relpath(path, self.root).replace(os.sep, "/")
+                files[url] = StaticFile(path, url in hashed_names)
+        return files
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        static_file = None
+        if path.startswith(self.prefix):
+            static_file = self.files.get(path[len(self.prefix):])
+        if static_file is None:
+            return self.application(environ, start_response)
+        if environ["REQUEST_METHOD"] not in ("GET", "HEAD"):
+            start_response("405 Method Not Allowed",
+                           [("Allow", "GET, HEAD"), ("Content-Length", "0")])
+            return []
+        return static_file.respond(environ, start_response)
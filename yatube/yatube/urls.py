@@ -11,15 +11,18 @@ handler500 = "posts.views.server_error"
 urlpatterns = [
     path("about/", include("about.urls", namespace="about")),
     path("admin/", admin.site.urls),
+    path("api/v1/", include("posts.api_urls")),
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
     path("", include("posts.urls")),
 ]
 
 if settings.DEBUG:
-    import debug_toolbar
     urlpatterns += static(settings.MEDIA_URL,
                           document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
-    urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),) 
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    import debug_toolbar
+    urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Templates are compiled at worker boot rather than on the first request
+if settings.TEMPLATE_WARMUP:
+    from posts.warmup import warmup
+
+    warmup()
+
+# Collected static files are served by the worker, without Django
+if settings.STATIC_HANDLER:
+    from yatube.staticfiles import StaticFiles
+
+    application = StaticFiles(application)